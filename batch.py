@@ -0,0 +1,162 @@
+import argparse
+import contextlib
+import csv
+import json
+import os
+import re
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from engines import DEFAULT_ENGINE, engine_names, schedule
+from models import Subject
+from timegrid import CALENDAR
+
+# CP-SAT search workers per department: departments already run in parallel across processes
+BATCH_SEARCH_WORKERS = 1
+
+# Function to schedule one department with any registered engine, returns {division: Timetable}
+def schedule_department(professors, subjects, divisions, classrooms=None, engine=DEFAULT_ENGINE, seed=None,
+                        **options):
+    return schedule(engine, professors, subjects, divisions, classrooms, seed, **options)[0]
+
+# Function to convert timetables to plain data: {division: {day name: [class, ...]}}
+def timetables_to_dict(timetables):
+    return {
+        str(division): {
+            CALENDAR.day_names[day]: [{"time": class_.time, "name": class_.name, "faculty": class_.faculty,
+                                 "subject": class_.subject, "classroom": class_.classroom}
+                                for class_ in classes]
+            for day, classes in enumerate(timetable.classes) if classes
+        }
+        for division, timetable in timetables.items()
+    }
+
+# Function to read a manifest of departments from a JSON or CSV file.
+# JSON: a list of departments (or {"departments": [...]}), each like
+#   {"name": "CS", "divisions": 3, "faculty": [{"name": "A", "subjects": ["Maths"]}],
+#    "classrooms": {"1": "R101"}, "engine": "ga", "seed": 0, "options": {"num_generations": 200}}
+#   A faculty entry may list the divisions it teaches, {"name": "A", "subjects": [...], "divisions": [1, 2]};
+#   the department is then split into independent subproblems, see decompose.py. The faculty members of
+#   each subproblem must teach all of its divisions, otherwise the department fails.
+# CSV: one row per subject with the columns department, divisions, faculty, subject and
+#   optionally engine and seed, taken from the first row of each department.
+def read_manifest(path):
+    if path.endswith(".csv"):
+        departments = {}
+        with open(path, newline="") as file:
+            for row in csv.DictReader(file):
+                department = departments.setdefault(row["department"], {
+                    "name": row["department"],
+                    "divisions": int(row["divisions"]),
+                    "faculty": {},
+                    "engine": row.get("engine") or DEFAULT_ENGINE,
+                    "seed": int(row["seed"]) if row.get("seed") else None,
+                })
+                department["faculty"].setdefault(row["faculty"], []).append(row["subject"])
+        departments = list(departments.values())
+        for department in departments:
+            department["faculty"] = [{"name": name, "subjects": subjects}
+                                     for name, subjects in department["faculty"].items()]
+    else:
+        with open(path) as file:
+            departments = json.load(file)
+        if isinstance(departments, dict):
+            departments = departments["departments"]
+
+    names = [department["name"] for department in departments]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate department names in manifest: {', '.join(duplicates)}")
+    for department in departments:
+        if department.get("engine", DEFAULT_ENGINE) not in engine_names():
+            raise ValueError(f"Unknown engine for {department['name']}: {department['engine']}")
+    return departments
+
+# Function to build the scheduler input of a manifest department
+def department_input(department):
+    engine = department.get("engine", DEFAULT_ENGINE)
+    professors = [faculty["name"] for faculty in department["faculty"]]
+    subjects = {faculty["name"]: [Subject(name, faculty["name"]) for name in faculty["subjects"]]
+                for faculty in department["faculty"]}
+    classrooms = {int(division): classroom for division, classroom in department.get("classrooms", {}).items()}
+    options = dict(department.get("options", {}))
+    if engine in ("cp-sat", "hybrid"):
+        options.setdefault("num_search_workers", BATCH_SEARCH_WORKERS)
+    return professors, subjects, department["divisions"], classrooms or None, engine, department.get("seed"), options
+
+def output_path(output_dir, name, extension="json"):
+    return os.path.join(output_dir, re.sub(r"[^\w.-]+", "_", name) + "." + extension)
+
+# Function run in a pool worker: schedule one department and write its timetables to a file,
+# and to the timetable store at store_path when given. Each format of exports (see export.FORMATS)
+# is streamed to one more file next to it.
+def run_department(department, output_dir, store_path=None, exports=()):
+    start = time.perf_counter()
+    professors, subjects, divisions, classrooms, engine, seed, options = department_input(department)
+    faculty_divisions = {faculty["name"]: faculty["divisions"] for faculty in department["faculty"]
+                         if "divisions" in faculty}
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        if faculty_divisions:
+            from decompose import solve_decomposed
+            timetables = solve_decomposed(professors, subjects, divisions, classrooms, faculty_divisions, engine, seed,
+                                          workers=1, **options)
+        else:
+            timetables = schedule_department(professors, subjects, divisions, classrooms, engine, seed, **options)
+
+    path = output_path(output_dir, department["name"])
+    with open(path, "w") as file:
+        json.dump({"department": department["name"], "engine": engine, "seed": seed,
+                   "timetables": timetables_to_dict(timetables)}, file, indent=2)
+    classes = sum(len(classes) for timetable in timetables.values() for classes in timetable.classes)
+    result = {"name": department["name"], "status": "done" if classes else "empty", "file": path,
+              "classes": classes, "wall_time": time.perf_counter() - start}
+    if exports:
+        from export import export_timetables
+        result["exports"] = []
+        for export_format in exports:
+            export_path = output_path(output_dir, department["name"], export_format)
+            with open(export_path, "w", newline="") as file:
+                export_timetables(timetables, export_format, file, name=department["name"])
+            result["exports"].append(export_path)
+    if store_path and classes:
+        from timetable_store import TimetableStore
+        result["timetable_id"] = TimetableStore(store_path).save(timetables, name=department["name"], engine=engine)
+    return result
+
+# Function to schedule every department of a manifest on a process pool, returns the per-department summary
+def run_batch(departments, output_dir, workers=None, store_path=None, exports=()):
+    os.makedirs(output_dir, exist_ok=True)
+    summary = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(run_department, department, output_dir, store_path, exports): department
+                   for department in departments}
+        for future in as_completed(futures):
+            name = futures[future]["name"]
+            try:
+                result = future.result()
+            except Exception:
+                result = {"name": name, "status": "failed", "error": traceback.format_exc(limit=5)}
+            summary.append(result)
+            print(f"{len(summary)}/{len(departments)} {name}: {result['status']}", file=sys.stderr)
+    summary.sort(key=lambda result: result["name"])
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the timetables of many departments from a manifest.")
+    parser.add_argument("manifest", help="JSON or CSV manifest of departments")
+    parser.add_argument("--output", default="timetables", help="directory for the timetable files")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--store", help="also save the timetables to this timetable store (SQLite file)")
+    parser.add_argument("--export", nargs="+", default=[], choices=["csv", "ics"],
+                        help="also write each department's timetables in these formats")
+    args = parser.parse_args()
+
+    departments = read_manifest(args.manifest)
+    summary = run_batch(departments, args.output, args.workers, args.store, args.export)
+    with open(os.path.join(args.output, "summary.json"), "w") as file:
+        json.dump(summary, file, indent=2)
+    return 1 if any(result["status"] == "failed" for result in summary) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
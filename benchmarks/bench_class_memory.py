@@ -0,0 +1,74 @@
+import os
+import sys
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import newminor2 as ga
+
+DIVISIONS = 20
+NUM_PROFESSORS = 10
+SUBJECTS_PER_PROFESSOR = 3
+NUM_INDIVIDUALS = 20
+
+# Legacy data classes (per-instance __dict__, display name formatted up front, num_classes list)
+class LegacyClass:
+    def __init__(self, name, time, faculty, subject, division, classroom):
+        self.name = name
+        self.time = time
+        self.faculty = faculty
+        self.subject = subject
+        self.division = division
+        self.classroom = classroom
+
+class LegacyTimetable:
+    def __init__(self):
+        self.classes = [[] for _ in range(ga.MAX_DAYS)]
+        self.num_classes = [0] * ga.MAX_DAYS
+
+# Legacy decoding of a genome into timetables
+def legacy_decode(genome, genes, classrooms):
+    timetables = {}
+    for division in range(1, len(genome) + 1):
+        timetable = LegacyTimetable()
+        for day in range(1, ga.MAX_DAYS):
+            for time_slot in range(ga.SLOTS_PER_DAY[day]):
+                faculty_name, subject = genes[genome[division - 1, day, time_slot]]
+                class_name = f"{subject.name}{faculty_name}{division}"
+                class_ = LegacyClass(class_name, ga.TIME_SLOTS[day][time_slot], faculty_name, subject.name, division,
+                                     classrooms[division])
+                timetable.classes[day].append(class_)
+                timetable.num_classes[day] += 1
+        timetables[division] = timetable
+    return timetables
+
+# Function to measure the traced memory held by the individuals built by decode, per individual
+def footprint(decode, population):
+    tracemalloc.start()
+    individuals = [decode(genome) for genome in population]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del individuals
+    return size / len(population)
+
+def main():
+    professors = [f"Prof_{i + 1}" for i in range(NUM_PROFESSORS)]
+    subjects = {professor: [ga.Subject(f"Sub_{i + 1}_{j + 1}", professor) for j in range(SUBJECTS_PER_PROFESSOR)]
+                for i, professor in enumerate(professors)}
+    genes = ga.build_gene_table(professors, subjects)[0]
+    classrooms = ga.default_classrooms(DIVISIONS)
+    population = ga.generate_initial_population(professors, subjects, DIVISIONS, NUM_INDIVIDUALS,
+                                                np.random.default_rng(0))
+
+    legacy = footprint(lambda genome: legacy_decode(genome, genes, classrooms), population)
+    slotted = footprint(lambda genome: ga.decode_timetables(genome, genes, classrooms), population)
+    print(f"{DIVISIONS} divisions, {ga.SLOT_MASK[1:].sum() * DIVISIONS} classes per individual")
+    print(f"{'representation':<15}  {'KiB/individual':>14}")
+    print(f"{'legacy':<15}  {legacy / 1024:>14.1f}")
+    print(f"{'slotted':<15}  {slotted / 1024:>14.1f}")
+    print(f"saving: {1 - slotted / legacy:.0%}")
+
+if __name__ == "__main__":
+    main()
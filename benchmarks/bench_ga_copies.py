@@ -0,0 +1,106 @@
+import copy
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import newminor2 as ga
+
+DIVISION_COUNTS = [5, 20, 100]
+NUM_PROFESSORS = 10
+SUBJECTS_PER_PROFESSOR = 3
+NUM_ROUNDS = 3
+
+# Function to build a synthetic professors/subjects instance
+def build_instance():
+    professors = [f"Prof_{i + 1}" for i in range(NUM_PROFESSORS)]
+    subjects = {professor: [ga.Subject(f"Sub_{i + 1}_{j + 1}", professor) for j in range(SUBJECTS_PER_PROFESSOR)]
+                for i, professor in enumerate(professors)}
+    return professors, subjects
+
+# Legacy fitness function (dict of Timetable objects, as before the array genome)
+def legacy_fitness(timetables):
+    fitness = 0
+    for division, timetable in timetables.items():
+        for day in range(1, ga.MAX_DAYS):
+            for class_ in timetable.classes[day]:
+                if timetable.num_classes[day] > 1:
+                    fitness -= 1
+    return fitness
+
+# Legacy tournament selection (deepcopy of every winner)
+def legacy_tournament_selection(population, tournament_size):
+    selected = []
+    for _ in range(len(population)):
+        participants = random.sample(population, tournament_size)
+        winner = max(participants, key=lambda x: legacy_fitness(x))
+        selected.append(copy.deepcopy(winner))
+    return selected
+
+# Legacy crossover (deepcopy of every day of every division)
+def legacy_crossover(parent1, parent2):
+    point1 = random.randint(1, ga.MAX_DAYS - 1)
+    point2 = random.randint(point1, ga.MAX_DAYS - 1)
+    child1 = {}
+    child2 = {}
+    for division in parent1.keys():
+        child1[division] = ga.Timetable()
+        child2[division] = ga.Timetable()
+        for day in range(1, ga.MAX_DAYS):
+            if day < point1 or day >= point2:
+                child1[division].classes[day] = copy.deepcopy(parent1[division].classes[day])
+                child2[division].classes[day] = copy.deepcopy(parent2[division].classes[day])
+            else:
+                child1[division].classes[day] = copy.deepcopy(parent2[division].classes[day])
+                child2[division].classes[day] = copy.deepcopy(parent1[division].classes[day])
+    return child1, child2
+
+# One round of selection + crossover on the legacy object path
+def legacy_round(population):
+    selected = legacy_tournament_selection(population, ga.TOURNAMENT_SIZE)
+    offspring = []
+    for i in range(0, len(selected) - 1, 2):
+        offspring.extend(legacy_crossover(selected[i], selected[i + 1]))
+    return offspring
+
+# One round of selection + crossover on the array path
+def array_round(population, fitness, buffer, rng):
+    winners = ga.tournament_selection(fitness, ga.TOURNAMENT_SIZE, rng)
+    num_pairs = len(winners) // 2
+    return ga.crossover(population, winners[0:2 * num_pairs:2], winners[1:2 * num_pairs:2], rng, buffer)[0]
+
+# Function to measure wall time and peak traced allocation of a callable
+def measure(run):
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(NUM_ROUNDS):
+        run()
+    elapsed = (time.perf_counter() - start) / NUM_ROUNDS
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+def main():
+    professors, subjects = build_instance()
+    print(f"{'divisions':>9}  {'path':<7}  {'ms/round':>10}  {'peak KiB':>10}")
+    for divisions in DIVISION_COUNTS:
+        random.seed(0)
+        legacy_population = [ga.round_robin_scheduling(professors, subjects, divisions)
+                             for _ in range(ga.POPULATION_SIZE)]
+        elapsed, peak = measure(lambda: legacy_round(legacy_population))
+        print(f"{divisions:>9}  {'legacy':<7}  {elapsed * 1000:>10.2f}  {peak / 1024:>10.1f}")
+
+        rng = np.random.default_rng(0)
+        population = ga.generate_initial_population(professors, subjects, divisions, ga.POPULATION_SIZE, rng)
+        fitness = ga.fitness_function(population, ga.build_constraint_model(professors, subjects, divisions))
+        buffer = population.copy()
+        elapsed, peak = measure(lambda: array_round(population, fitness, buffer, rng))
+        print(f"{divisions:>9}  {'array':<7}  {elapsed * 1000:>10.2f}  {peak / 1024:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+import argparse
+import http.cookiejar
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Simulated users of the apps: each one logs in (ttgenerator only), opens the input form, then submits
+# generation requests and polls the job result page until the timetable is served.
+# Latency is recorded per step; throughput is the number of HTTP requests completed per second.
+USERS = 50
+REQUESTS_PER_USER = 5
+DISTINCT_REQUESTS = 10  # Different forms submitted, the rest are result cache hits
+POLL_INTERVAL = 0.2  # seconds between polls of a job that is still running
+REQUEST_TIMEOUT = 60.0  # seconds
+STARTUP_TIMEOUT = 30.0  # seconds to wait for a started server to accept connections
+USERNAME = "admin"
+PASSWORD = "kle@123"
+# Synthetic form of a generation request
+FACULTY = 6
+SUBJECTS_PER_FACULTY = 2
+DIVISIONS = 5
+TIME_QUANTUM = 60
+
+# Function to build the generation form of a request, variant picks its seed
+def generation_form(variant):
+    form = {"num_faculty": FACULTY, "divisions": DIVISIONS, "time_quantum": TIME_QUANTUM, "seed": variant}
+    for i in range(1, FACULTY + 1):
+        form[f"faculty_{i}_name"] = f"Prof_{i}"
+        form[f"faculty_{i}_subjects"] = SUBJECTS_PER_FACULTY
+        for j in range(1, SUBJECTS_PER_FACULTY + 1):
+            form[f"faculty_{i}_subject_{j}"] = f"Sub_{i}_{j}"
+    return urllib.parse.urlencode(form).encode()
+
+# Function to pick the value at a percentile of sorted values (nearest rank)
+def percentile(values, fraction):
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, round(fraction * len(values)) - 1))]
+
+# Latencies and errors of every step, shared by the user threads
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+
+    def record(self, step, seconds, error=None):
+        with self.lock:
+            if error is None:
+                self.latencies.setdefault(step, []).append(seconds)
+            else:
+                self.errors.setdefault(step, {}).setdefault(error, 0)
+                self.errors[step][error] += 1
+
+    def summary(self, wall_time):
+        steps = {}
+        for step in sorted(set(self.latencies) | set(self.errors)):
+            values = sorted(self.latencies.get(step, []))
+            steps[step] = {"count": len(values), "errors": self.errors.get(step, {}),
+                           "p50": percentile(values, 0.5), "p99": percentile(values, 0.99),
+                           "max": values[-1] if values else None}
+        requests = sum(len(values) for values in self.latencies.values())
+        errors = sum(sum(errors.values()) for errors in self.errors.values())
+        return {"wall_time": wall_time, "requests": requests, "errors": errors,
+                "throughput": requests / wall_time if wall_time else None, "steps": steps}
+
+# One simulated user with its own cookie session
+class User:
+    def __init__(self, base_url, recorder):
+        self.base_url = base_url
+        self.recorder = recorder
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    # Function to send one request and record its latency under step, returns (status, final url) or None
+    def request(self, step, path, data=None):
+        start = time.perf_counter()
+        try:
+            with self.opener.open(self.base_url + path, data, timeout=REQUEST_TIMEOUT) as response:
+                response.read()
+                status, url = response.status, response.geturl()
+        except urllib.error.HTTPError as error:
+            error.read()
+            self.recorder.record(step, None, f"HTTP {error.code}")
+            return None
+        except (urllib.error.URLError, OSError) as error:
+            self.recorder.record(step, None, type(getattr(error, "reason", error)).__name__)
+            return None
+        self.recorder.record(step, time.perf_counter() - start)
+        return status, url
+
+    def login(self):
+        self.request("login_page", "/")
+        response = self.request("login", "/", urllib.parse.urlencode(
+            {"username": USERNAME, "password": PASSWORD}).encode())
+        return response is not None and response[1].endswith("/input_form")
+
+    # Function to submit one generation request and poll its result, records the time until the timetable
+    def generate(self, variant):
+        start = time.perf_counter()
+        response = self.request("generate", "/generate", generation_form(variant))
+        while response is not None and response[0] == 202:
+            time.sleep(POLL_INTERVAL)
+            response = self.request("job_result", urllib.parse.urlparse(response[1])._replace(
+                scheme="", netloc="").geturl())
+        if response is not None:
+            self.recorder.record("timetable", time.perf_counter() - start)
+
+    def run(self, requests, variants, login):
+        if login and not self.login():
+            self.recorder.record("timetable", None, "login failed")
+            return
+        self.request("input_form", "/input_form" if login else "/")
+        for variant in variants[:requests]:
+            self.generate(variant)
+
+# Function to find a free local port for a started server
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+# Function to start serve.py on a free port with its own result cache and timetable store,
+# returns the process and the base url once the server accepts connections
+def start_server(app, workers, threads, server, directory):
+    port = free_port()
+    command = [sys.executable, os.path.join(ROOT, "serve.py"), app, "--port", str(port),
+               "--workers", str(workers), "--threads", str(threads)] + (["--server", server] if server else [])
+    env = dict(os.environ, TIMETABLE_CACHE_DIR=os.path.join(directory, "cache"),
+               TIMETABLE_JOB_DIR=os.path.join(directory, "jobs"),
+               TIMETABLE_STORE=os.path.join(directory, "timetables.sqlite3"))
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.perf_counter() + STARTUP_TIMEOUT
+    while time.perf_counter() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return process, f"http://127.0.0.1:{port}"
+        except OSError:
+            if process.poll() is not None:
+                break
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"Server did not start: {' '.join(command)}")
+
+# Function to run every user on its own thread, returns the recorder's summary
+def run_load(base_url, users, requests, distinct, login):
+    recorder = Recorder()
+    threads = [threading.Thread(target=User(base_url, recorder).run,
+                                args=(requests, [(user + i) % distinct for i in range(requests)], login))
+               for user in range(users)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder.summary(time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the apps with concurrent simulated users.")
+    parser.add_argument("--app", default="ttgenerator", choices=["ttgenerator", "generator"])
+    parser.add_argument("--url", help="test a running server instead of starting serve.py")
+    parser.add_argument("--users", type=int, default=USERS)
+    parser.add_argument("--requests", type=int, default=REQUESTS_PER_USER, help="generation requests per user")
+    parser.add_argument("--distinct", type=int, default=DISTINCT_REQUESTS, help="distinct generation requests")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="serve.py worker processes")
+    parser.add_argument("--threads", type=int, default=8, help="serve.py request threads per worker")
+    parser.add_argument("--server", help="serve.py server (default: the first one installed)")
+    args = parser.parse_args()
+
+    process = None
+    with tempfile.TemporaryDirectory() as directory:
+        if args.url:
+            base_url = args.url.rstrip("/")
+        else:
+            process, base_url = start_server(args.app, args.workers, args.threads, args.server, directory)
+        try:
+            summary = run_load(base_url, args.users, args.requests, args.distinct, args.app == "ttgenerator")
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+    for step, result in summary["steps"].items():
+        latency = (f"p50 {result['p50'] * 1000:8.1f} ms  p99 {result['p99'] * 1000:8.1f} ms"
+                   if result["count"] else " " * 32)
+        print(f"{step:<12} {result['count']:6d}  {latency}  errors {sum(result['errors'].values())}",
+              file=sys.stderr)
+    print(f"{summary['requests']} requests in {summary['wall_time']:.1f} s: "
+          f"{summary['throughput']:.1f} requests/s", file=sys.stderr)
+
+    json.dump({"app": args.app, "url": args.url, "users": args.users, "requests_per_user": args.requests,
+               "distinct_requests": args.distinct, "workers": args.workers, "threads": args.threads,
+               "server": args.server, "timestamp": time.time(), **summary}, sys.stdout, indent=2)
+    print()
+    return 1 if summary["errors"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
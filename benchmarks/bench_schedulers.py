@@ -0,0 +1,207 @@
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from engines import schedule
+from models import Subject
+from constraints import (FACULTY_CLASH_WEIGHT, ROOM_CLASH_WEIGHT, SUBJECT_HOURS_WEIGHT, FACULTY_LOAD_WEIGHT,
+                         band_penalty)
+from occupancy import OccupancyIndex
+from timegrid import CALENDAR, Calendar
+
+ENGINES = ["random", "cp-sat", "ga", "hybrid", "pareto"]
+# (faculty, subjects per faculty, divisions, teaching days) of the synthetic instances,
+# None days keeps the configured calendar (TIMETABLE_CALENDAR or the default week)
+SIZES = [(10, 3, 5, None), (40, 3, 20, None), (150, 3, 40, None)]
+WEEKDAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+SEEDS = [0]
+CP_SAT_TIME_LIMIT = 30.0  # seconds
+GA_GENERATIONS = 100
+
+# Function to write a generated calendar of days full teaching days (Monday first, no holidays or half days)
+# with the configured slots, returns its path for TIMETABLE_CALENDAR
+def write_calendar(days, directory):
+    calendar = Calendar(WEEKDAY_NAMES[:days], CALENDAR.slot_times, holidays=[], half_days={}, breaks=CALENDAR.breaks)
+    path = os.path.join(directory, f"calendar_{days}.json")
+    with open(path, "w") as file:
+        json.dump(calendar.to_dict(), file)
+    return path
+
+# Function to build a synthetic instance
+def build_instance(num_faculty, subjects_per_faculty, divisions):
+    professors = [f"Prof_{i + 1}" for i in range(num_faculty)]
+    subjects = {professor: [Subject(f"Sub_{i + 1}_{j + 1}", professor) for j in range(subjects_per_faculty)]
+                for i, professor in enumerate(professors)}
+    classrooms = {division: f"Room_{division}" for division in range(1, divisions + 1)}
+    return professors, subjects, classrooms
+
+# Engine options built from the command line options, and the statistics kept in the results
+ENGINE_OPTIONS = {
+    "random": lambda options: {},
+    "cp-sat": lambda options: {"time_limit": options["time_limit"]},
+    "ga": lambda options: {"num_generations": options["generations"]},
+    "hybrid": lambda options: {"cp_sat_time_limit": options["time_limit"]},
+    "pareto": lambda options: {"num_generations": options["generations"]},
+}
+ENGINE_DETAILS = {
+    "random": (),
+    "cp-sat": ("status", "build_time"),
+    "ga": ("generations", "stopped"),
+    "hybrid": ("seed_fitness", "faculty_gaps"),
+    "pareto": ("front_size", "pareto_front"),
+}
+
+# Function to run one engine on one instance, returns the timetables and engine specific details
+def run_engine(engine, professors, subjects, divisions, classrooms, seed, options):
+    timetables, stats = schedule(engine, professors, subjects, divisions, classrooms, seed,
+                                 **ENGINE_OPTIONS[engine](options))
+    return timetables, {key: stats[key] for key in ENGINE_DETAILS[engine]}
+
+# Function to count constraint violations of timetables of any engine, using the GA's penalty weights
+#  - faculty / room / division clashes: bookings of the same (day, time) beyond the first one
+#  - subject hours and faculty load: weekly counts outside an even share, as in constraints.py
+def evaluate(timetables, professors, subjects):
+    division_bookings = Counter()
+    hours = Counter()
+    load = Counter()
+    for division, timetable in timetables.items():
+        for day, classes in enumerate(timetable.classes):
+            for class_ in classes:
+                division_bookings[(division, day, class_.time)] += 1
+                hours[(division, class_.subject)] += 1
+                load[class_.faculty] += 1
+
+    faculty_clashes, room_clashes = OccupancyIndex.from_timetables(timetables).clashes()
+
+    subject_names = sorted({subject.name for professor in professors for subject in subjects[professor]})
+    weekly_slots = CALENDAR.weekly_slots
+    hours_penalty = sum(int(band_penalty(hours[(division, name)], weekly_slots // len(subject_names),
+                                         -(-weekly_slots // len(subject_names))))
+                        for division in timetables for name in subject_names)
+    total_classes = weekly_slots * len(timetables)
+    load_penalty = sum(int(band_penalty(load[professor], total_classes // len(professors),
+                                        -(-total_classes // len(professors))))
+                       for professor in professors)
+
+    violations = {
+        "classes": sum(load.values()),
+        "faculty_clashes": faculty_clashes,
+        "room_clashes": room_clashes,
+        "division_clashes": sum(count - 1 for count in division_bookings.values() if count > 1),
+        "subject_hours_penalty": hours_penalty,
+        "faculty_load_penalty": load_penalty,
+    }
+    violations["fitness"] = -(FACULTY_CLASH_WEIGHT * violations["faculty_clashes"]
+                              + ROOM_CLASH_WEIGHT * violations["room_clashes"]
+                              + SUBJECT_HOURS_WEIGHT * hours_penalty + FACULTY_LOAD_WEIGHT * load_penalty)
+    return violations
+
+# Peak resident set size of this process in KiB
+def peak_rss_kib():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+# Function run in a fresh worker process, so that the peak RSS belongs to this run alone
+def benchmark(engine, num_faculty, subjects_per_faculty, divisions, seed, options):
+    professors, subjects, classrooms = build_instance(num_faculty, subjects_per_faculty, divisions)
+    rss_before = peak_rss_kib()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        timetables, details = run_engine(engine, professors, subjects, divisions, classrooms, seed, options)
+        wall_time = time.perf_counter() - start
+
+    result = {
+        "engine": engine,
+        "faculty": num_faculty,
+        "subjects_per_faculty": subjects_per_faculty,
+        "divisions": divisions,
+        "days": len(CALENDAR.teaching_days),
+        "seed": seed,
+        "wall_time": wall_time,
+        "peak_rss_kib": peak_rss_kib(),
+        "baseline_rss_kib": rss_before,
+    }
+    result.update(evaluate(timetables, professors, subjects))
+    result.update(details)
+    return result
+
+# Commit the numbers belong to, so runs can be compared across commits
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def parse_size(text):
+    values = [int(value) for value in text.split("x")]
+    if len(values) not in (3, 4) or (len(values) == 4 and not 1 <= values[3] <= len(WEEKDAY_NAMES)):
+        raise argparse.ArgumentTypeError(f"expected FACULTYxSUBJECTSxDIVISIONS[xDAYS] with 1-7 days: {text}")
+    return tuple(values) if len(values) == 4 else tuple(values) + (None,)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the timetable schedulers on synthetic instances.")
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=ENGINES)
+    parser.add_argument("--sizes", nargs="+", type=parse_size, default=SIZES,
+                        help="instances as FACULTYxSUBJECTSxDIVISIONS[xDAYS], e.g. 10x3x5 or 10x3x5x6 "
+                             "for a generated week of 6 full teaching days")
+    parser.add_argument("--seeds", nargs="+", type=int, default=SEEDS)
+    parser.add_argument("--time-limit", type=float, default=CP_SAT_TIME_LIMIT, help="CP-SAT time limit (s)")
+    parser.add_argument("--generations", type=int, default=GA_GENERATIONS, help="GA generations")
+    parser.add_argument("--output", help="write the results as JSON to this file instead of stdout")
+    args = parser.parse_args()
+
+    options = {"time_limit": args.time_limit, "generations": args.generations}
+    results = []
+    configured_calendar = os.environ.get("TIMETABLE_CALENDAR")
+    with tempfile.TemporaryDirectory() as directory:
+        for num_faculty, subjects_per_faculty, divisions, days in args.sizes:
+            # Spawned workers read the calendar from the environment when they import the schedulers
+            if days is not None:
+                os.environ["TIMETABLE_CALENDAR"] = write_calendar(days, directory)
+            elif configured_calendar is not None:
+                os.environ["TIMETABLE_CALENDAR"] = configured_calendar
+            else:
+                os.environ.pop("TIMETABLE_CALENDAR", None)
+            for engine in args.engines:
+                for seed in args.seeds:
+                    with ProcessPoolExecutor(max_workers=1,
+                                             mp_context=multiprocessing.get_context("spawn")) as executor:
+                        result = executor.submit(benchmark, engine, num_faculty, subjects_per_faculty, divisions,
+                                                 seed, options).result()
+                    results.append(result)
+                    print(f"{engine:<7} {num_faculty:>4}x{subjects_per_faculty}x{divisions:<4} "
+                          f"{result['days']} days seed {seed}: {result['wall_time']:8.3f}s  "
+                          f"{result['peak_rss_kib'] / 1024:7.1f} MiB  fitness {result['fitness']}", file=sys.stderr)
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.time(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Entry points that must start fast, and the solver libraries none of them may import before an engine is used
+MODULES = ["generator", "ttgenerator", "timetable_store", "batch", "engines", "export", "serve"]
+HEAVY_MODULES = ["ortools", "numpy", "pandas"]
+# Measured for reference only: the web apps cannot start faster than their framework
+REFERENCE_MODULES = ["flask"]
+# The Flask apps are budgeted on their import time over the Flask import (measured in the same run),
+# the other modules on their import time over a bare interpreter
+APP_MODULES = ["generator", "ttgenerator"]
+STARTUP_BUDGET = 0.2  # seconds
+APP_STARTUP_BUDGET = 0.1  # seconds over the Flask import
+REPEATS = 5
+
+# Function to time one import in a fresh interpreter, returns the import time in seconds
+# and the heavy modules it loaded
+def import_time(module):
+    code = (f"import sys, time; start = time.perf_counter(); import {module}; "
+            f"print(time.perf_counter() - start); print(','.join(name for name in {HEAVY_MODULES!r} "
+            "if name in sys.modules))")
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True,
+                            check=True).stdout.splitlines()
+    return float(output[0]), [name for name in output[1].split(",") if name]
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the import time of the apps and CLI entry points.")
+    parser.add_argument("--modules", nargs="+", default=MODULES)
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET, help="import time budget (s)")
+    parser.add_argument("--app-budget", type=float, default=APP_STARTUP_BUDGET,
+                        help="import time budget of the Flask apps over the Flask import (s)")
+    args = parser.parse_args()
+
+    results = []
+    reference = {}
+    for module in REFERENCE_MODULES + args.modules:
+        times = []
+        for _ in range(args.repeats):
+            seconds, heavy = import_time(module)
+            times.append(seconds)
+        median = statistics.median(times)
+        result = {"module": module, "median": median, "min": min(times), "heavy_modules": heavy}
+        over = ""
+        if module in REFERENCE_MODULES:
+            reference[module] = median
+        elif module in APP_MODULES:
+            result["over_flask"] = median - reference["flask"]
+            result["within_budget"] = result["over_flask"] <= args.app_budget and not heavy
+            over = f"  (+{result['over_flask'] * 1000:.1f} ms over flask)"
+        else:
+            result["within_budget"] = median <= args.budget and not heavy
+        results.append(result)
+        print(f"{module:<16} {median * 1000:7.1f} ms{over}  {'heavy: ' + ', '.join(heavy) if heavy else ''}",
+              file=sys.stderr)
+
+    json.dump({"budget": args.budget, "app_budget": args.app_budget, "timestamp": time.time(),
+               "results": results}, sys.stdout, indent=2)
+    print()
+    return 0 if all(result.get("within_budget", True) for result in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
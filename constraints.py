@@ -0,0 +1,141 @@
+import numpy as np
+
+EMPTY_GENE = -1
+
+# Penalty weights, hard constraints (clashes) weigh more than soft ones
+FACULTY_CLASH_WEIGHT = 10
+ROOM_CLASH_WEIGHT = 10
+SUBJECT_HOURS_WEIGHT = 1
+FACULTY_LOAD_WEIGHT = 1
+FACULTY_GAP_WEIGHT = 1
+
+# Penalty of an occupancy count: every booking beyond the first one is a clash
+def clash_penalty(counts):
+    return np.maximum(counts - 1, 0)
+
+# Penalty of a count outside the [low, high] target band
+def band_penalty(counts, low, high):
+    return np.maximum(low - counts, 0) + np.maximum(counts - high, 0)
+
+# Idle slots of every individual: for each faculty and day, the free slots between its first
+# and last class. occupancy is a faculty occupancy index of shape (individuals, days, slots, faculty).
+def faculty_gaps(occupancy):
+    booked = occupancy > 0
+    slots = booked.shape[2]
+    classes = booked.sum(axis=2)
+    first = booked.argmax(axis=2)
+    last = slots - 1 - booked[:, :, ::-1].argmax(axis=2)
+    return np.where(classes > 0, last - first + 1 - classes, 0).sum(axis=(1, 2))
+
+# Constraint model over array genomes of shape (individuals, divisions, days, slots) holding gene ids
+#  - faculty clashes: a faculty booked in more than one division at the same (day, slot)
+#  - room clashes: a room used by more than one division at the same (day, slot)
+#  - subject hours: weekly classes of each subject per division outside its target
+#  - faculty load: weekly classes of each faculty outside an even share of the total
+class ConstraintModel:
+    def __init__(self, gene_faculty, gene_subject, division_room, slot_mask, num_faculty, num_subjects,
+                 num_rooms, subject_hours=None):
+        # A trailing -1 so that EMPTY_GENE (-1) maps to "no faculty" / "no subject"
+        self.gene_faculty = np.append(gene_faculty, -1)
+        self.gene_subject = np.append(gene_subject, -1)
+        self.division_room = np.asarray(division_room)
+        self.num_faculty = num_faculty
+        self.num_subjects = num_subjects
+        self.num_rooms = num_rooms
+
+        weekly_slots = int(slot_mask.sum())
+        if subject_hours is None:
+            self.hours_low = weekly_slots // num_subjects
+            self.hours_high = -(-weekly_slots // num_subjects)
+        else:
+            self.hours_low = self.hours_high = np.asarray(subject_hours)
+
+        total_classes = weekly_slots * len(self.division_room)
+        self.load_low = total_classes // num_faculty
+        self.load_high = -(-total_classes // num_faculty)
+
+    # Function to count classes per (row, column) key over the filled cells of an array
+    @staticmethod
+    def count(rows, columns, filled, num_rows, num_columns):
+        keys = (rows * num_columns + columns)[filled]
+        return np.bincount(keys, minlength=num_rows * num_columns).reshape(num_rows, num_columns)
+
+    # Faculty occupancy index of every individual, shape (individuals, days, slots, faculty)
+    def faculty_occupancy(self, population):
+        individuals, divisions, days, slots = population.shape
+        cell = np.arange(individuals * days * slots).reshape(individuals, 1, days, slots)
+        faculty = self.gene_faculty[population]
+        occupancy = self.count(np.broadcast_to(cell, population.shape), faculty, population != EMPTY_GENE,
+                               individuals * days * slots, self.num_faculty)
+        return occupancy.reshape(individuals, days, slots, self.num_faculty).astype(np.int32)
+
+    # Clash penalties of day blocks, each block holds one day of every division: shape (blocks, divisions, slots)
+    def day_penalties(self, blocks):
+        num_blocks, divisions, slots = blocks.shape
+        cell = np.broadcast_to(np.arange(num_blocks * slots).reshape(num_blocks, 1, slots), blocks.shape)
+        filled = blocks != EMPTY_GENE
+
+        faculty = self.count(cell, self.gene_faculty[blocks], filled, num_blocks * slots, self.num_faculty)
+        room = self.count(cell, np.broadcast_to(self.division_room[None, :, None], blocks.shape), filled,
+                          num_blocks * slots, self.num_rooms)
+
+        return (FACULTY_CLASH_WEIGHT * clash_penalty(faculty).reshape(num_blocks, -1).sum(axis=1)
+                + ROOM_CLASH_WEIGHT * clash_penalty(room).reshape(num_blocks, -1).sum(axis=1))
+
+    # Weekly classes of every subject in every division, shape (individuals, divisions, subjects)
+    def subject_hours(self, population):
+        individuals, divisions = population.shape[:2]
+        division = np.arange(individuals * divisions).reshape(individuals, divisions, 1, 1)
+        return self.count(np.broadcast_to(division, population.shape), self.gene_subject[population],
+                          population != EMPTY_GENE, individuals * divisions,
+                          self.num_subjects).reshape(individuals, divisions, -1)
+
+    # Weekly classes of every faculty member, shape (individuals, faculty)
+    def faculty_load(self, population):
+        individual = np.arange(len(population)).reshape(-1, 1, 1, 1)
+        return self.count(np.broadcast_to(individual, population.shape), self.gene_faculty[population],
+                          population != EMPTY_GENE, len(population), self.num_faculty)
+
+    # Weekly penalties of every individual: subject hour targets and faculty load balance
+    def weekly_penalties(self, population):
+        hours = band_penalty(self.subject_hours(population), self.hours_low, self.hours_high).sum(axis=(1, 2))
+        load = band_penalty(self.faculty_load(population), self.load_low, self.load_high).sum(axis=1)
+        return SUBJECT_HOURS_WEIGHT * hours + FACULTY_LOAD_WEIGHT * load
+
+    # Room changes of every individual: consecutive classes of a faculty member held in different rooms
+    def room_changes(self, population):
+        individual, division, day, slot = np.nonzero(population != EMPTY_GENE)
+        rooms = np.full((len(population), population.shape[2], population.shape[3], self.num_faculty), -1)
+        rooms[individual, day, slot, self.gene_faculty[population[individual, division, day, slot]]] = \
+            self.division_room[division]
+        changed = (rooms[:, :, 1:] >= 0) & (rooms[:, :, :-1] >= 0) & (rooms[:, :, 1:] != rooms[:, :, :-1])
+        return changed.sum(axis=(1, 2, 3))
+
+    # Back-to-back classes of every individual: a division having the same subject in two consecutive slots
+    def back_to_back(self, population):
+        subject = self.gene_subject[population]
+        repeated = (subject[..., 1:] == subject[..., :-1]) & (population[..., 1:] != EMPTY_GENE)
+        return repeated.sum(axis=(1, 2, 3))
+
+    # Function to apply the delta of swaps that were just performed on the population.
+    # Each swap exchanged slot1 and slot2 of one (individual, division, day), so only four
+    # occupancy cells change per swap and only the faculty clash term of that day moves:
+    # room usage and weekly counts are the same before and after a swap within a day.
+    def apply_swaps(self, population, occupancy, scores, individual, division, day, slot1, slot2):
+        faculty1 = self.gene_faculty[population[individual, division, day, slot1]]
+        faculty2 = self.gene_faculty[population[individual, division, day, slot2]]
+
+        index = np.ravel_multi_index((np.tile(individual, 4), np.tile(day, 4),
+                                      np.concatenate((slot1, slot1, slot2, slot2)),
+                                      np.concatenate((faculty2, faculty1, faculty1, faculty2))), occupancy.shape)
+        change = np.repeat([-1, 1, -1, 1], len(individual))
+
+        flat = occupancy.reshape(-1)
+        touched, inverse = np.unique(index, return_inverse=True)
+        before = clash_penalty(flat[touched])
+        flat[touched] += np.bincount(inverse, weights=change).astype(flat.dtype)
+        delta = clash_penalty(flat[touched]) - before
+
+        touched_individual, touched_day = np.unravel_index(touched, occupancy.shape)[:2]
+        scores.reshape(-1)[:] -= FACULTY_CLASH_WEIGHT * np.bincount(
+            touched_individual * scores.shape[1] + touched_day, weights=delta, minlength=scores.size)
@@ -0,0 +1,297 @@
+import time
+from ortools.sat.python import cp_model
+from models import Class, Timetable
+from timegrid import CALENDAR
+from metrics import METRICS
+
+# CP-SAT scheduler, kept apart from the web app so that OR-Tools is only imported when it is used
+NUM_SEARCH_WORKERS = 8
+SOLVER_TIME_LIMIT = 30.0  # seconds
+
+# Time slots for each day, excluding break times
+TIME_SLOTS = CALENDAR.time_slots
+
+# Function to build the CP-SAT model: one BoolVar per (division, day, slot, faculty).
+# Subjects are not part of the model, they are spread over each faculty's classes after solving.
+def build_model(professors, divisions, hint=True):
+    model = cp_model.CpModel()
+
+    assignments = {}
+    load = {professor: [] for professor in professors}
+    for day, time_slot in CALENDAR.cells:
+        booked = {professor: [] for professor in professors}
+        for division in range(1, divisions + 1):
+            class_vars = []
+            for professor in professors:
+                var = model.NewBoolVar(f"{division}_{day}_{time_slot}_{professor}")
+                assignments[(division, day, time_slot, professor)] = var
+                class_vars.append(var)
+                booked[professor].append(var)
+                load[professor].append(var)
+
+            # Exactly one faculty member teaches every class of every division
+            model.AddExactlyOne(class_vars)
+
+        # A faculty member teaches at most one division at any (day, slot)
+        for professor in professors:
+            model.AddAtMostOne(booked[professor])
+
+    # Even teaching load across faculty members
+    total_classes = divisions * CALENDAR.weekly_slots
+    for professor in professors:
+        model.AddLinearConstraint(cp_model.LinearExpr.Sum(load[professor]),
+                                  total_classes // len(professors), -(-total_classes // len(professors)))
+
+    # Symmetry breaking: divisions are interchangeable, so order them by the faculty
+    # member teaching their first class of the week
+    first_day, first_slot = CALENDAR.cells[0]
+    first_faculty = [cp_model.LinearExpr.WeightedSum([assignments[(division, first_day, first_slot, professor)]
+                                                      for professor in professors], range(len(professors)))
+                     for division in range(1, divisions + 1)]
+    for division in range(1, divisions):
+        model.Add(first_faculty[division - 1] < first_faculty[division])
+
+    # Hint: the round-robin layout, which is feasible whenever there are at least as many faculty as divisions.
+    # Written straight into the proto, AddHint per variable costs more than building the model.
+    if hint:
+        hint_vars = []
+        hint_values = []
+        for cell_id, (day, time_slot) in enumerate(CALENDAR.cells):
+            for division in range(1, divisions + 1):
+                chosen = professors[(cell_id * divisions + division - 1) % len(professors)]
+                for professor in professors:
+                    hint_vars.append(assignments[(division, day, time_slot, professor)].Index())
+                    hint_values.append(int(professor == chosen))
+        model.Proto().solution_hint.vars.extend(hint_vars)
+        model.Proto().solution_hint.values.extend(hint_values)
+
+    return model, assignments
+
+# Function to configure the CP-SAT solver
+# Presolve dominates the run time on large instances; when a complete hint is given the
+# search starts from it directly, so presolve is skipped unless asked for.
+def build_solver(num_search_workers=NUM_SEARCH_WORKERS, time_limit=SOLVER_TIME_LIMIT, presolve=True, seed=None):
+    solver = cp_model.CpSolver()
+    solver.parameters.num_workers = num_search_workers
+    solver.parameters.max_time_in_seconds = time_limit
+    solver.parameters.cp_model_presolve = presolve
+    if seed is not None:
+        solver.parameters.random_seed = seed
+    return solver
+
+# Solution callback forwarding every improving solution to a progress callback
+class SolverProgress(cp_model.CpSolverSolutionCallback):
+    def __init__(self, progress):
+        cp_model.CpSolverSolutionCallback.__init__(self)
+        self.progress = progress
+        self.solutions = 0
+
+    def on_solution_callback(self):
+        self.solutions += 1
+        self.progress(phase="solving", solutions=self.solutions, objective=self.ObjectiveValue(),
+                      bound=self.BestObjectiveBound(), wall_time=self.WallTime())
+
+# Function to run the solver, reporting solutions to progress when given
+def run_solver(solver, model, progress=None):
+    if progress is None:
+        return solver.Solve(model)
+    progress(phase="solving")
+    return solver.Solve(model, SolverProgress(progress))
+
+# Function to report solve time and search effort
+def solver_stats(solver, status):
+    return {
+        "status": solver.StatusName(status),
+        "wall_time": solver.WallTime(),
+        "branches": solver.NumBranches(),
+        "conflicts": solver.NumConflicts(),
+    }
+
+# Function to read the faculty member the solver assigned to every class
+def solved_faculty(solver, assignments, professors, cells):
+    faculty = {}
+    for cell in cells:
+        for professor in professors:
+            if cell + (professor,) in assignments and solver.BooleanValue(assignments[cell + (professor,)]):
+                faculty[cell] = professor
+                break
+    return faculty
+
+# Function to list the (division, day, time_slot) cells of every division
+def all_cells(divisions):
+    return [(division, day, time_slot)
+            for division in range(1, divisions + 1)
+            for day, time_slot in CALENDAR.cells]
+
+# Function to build timetables from the faculty assigned to each cell.
+# Each faculty member's subjects are spread round-robin over the classes it teaches in a division;
+# cells listed in keep_subjects keep that subject instead.
+def build_timetables(faculty, subjects, divisions, classrooms, keep_subjects=None):
+    keep_subjects = keep_subjects or {}
+    timetables = {division: Timetable() for division in range(1, divisions + 1)}
+    taught = {}
+    for (division, day, time_slot), professor in sorted(faculty.items()):
+        subject = keep_subjects.get((division, day, time_slot))
+        if subject is None:
+            subject = min(subjects[professor], key=lambda subject: taught.get((division, subject.name), 0))
+        taught[(division, subject.name)] = taught.get((division, subject.name), 0) + 1
+
+        class_ = Class(time_slot, TIME_SLOTS[day][time_slot], professor, subject.name, division, classrooms[division])
+        timetables[division].classes[day].append(class_)
+    return timetables
+
+# Function to solve the timetable model, returns the timetables and the solver statistics
+def solve_timetables(professors, subjects, divisions, classrooms, num_search_workers=NUM_SEARCH_WORKERS,
+                     time_limit=SOLVER_TIME_LIMIT, hint=True, presolve=None, seed=None, progress=None):
+    if progress is not None:
+        progress(phase="building model")
+    build_start = time.perf_counter()
+    model, assignments = build_model(professors, divisions, hint)
+    build_time = time.perf_counter() - build_start
+
+    solver = build_solver(num_search_workers, time_limit, not hint if presolve is None else presolve, seed)
+    status = run_solver(solver, model, progress)
+    stats = solver_stats(solver, status)
+    stats["build_time"] = build_time
+    METRICS.observe("cpsat_build_seconds", build_time)
+    METRICS.observe("cpsat_solve_seconds", stats["wall_time"])
+
+    if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
+        faculty = solved_faculty(solver, assignments, professors, all_cells(divisions))
+        timetables = build_timetables(faculty, subjects, divisions, classrooms)
+    else:
+        timetables = {division: Timetable() for division in range(1, divisions + 1)}
+    return timetables, stats
+
+# Function to read the faculty member and subject of every class of existing timetables
+def previous_assignments(timetables):
+    faculty = {}
+    subject_names = {}
+    for division, timetable in timetables.items():
+        for day in CALENDAR.teaching_days:
+            for class_ in timetable.classes[day]:
+                cell = (division, day, class_.slot)
+                faculty[cell] = class_.faculty
+                subject_names[cell] = class_.subject
+    return faculty, subject_names
+
+# Function to build the repair model: only the open cells get variables (one per candidate faculty
+# member), every other cell keeps its previous faculty member and is folded into the constraints as a constant.
+# The previous solution is the hint and the objective keeps as many open cells unchanged as possible.
+# Nobody may go over the even load share, but only newcomers must reach it: a faculty member
+# losing one class to a blocked slot should not ripple through the whole week.
+def build_repair_model(previous, professors, cells, open_cells, newcomers=()):
+    model = cp_model.CpModel()
+    assignments = {}
+    booked = {}
+    load = {professor: [] for professor in professors}
+    fixed_booked = {}
+    fixed_load = {professor: 0 for professor in professors}
+    unchanged = []
+
+    for cell in cells:
+        division, day, time_slot = cell
+        if cell not in open_cells:
+            professor = previous[cell]
+            fixed_booked[(day, time_slot, professor)] = fixed_booked.get((day, time_slot, professor), 0) + 1
+            fixed_load[professor] += 1
+            continue
+
+        class_vars = []
+        for professor in open_cells[cell]:
+            var = model.NewBoolVar(f"{division}_{day}_{time_slot}_{professor}")
+            assignments[cell + (professor,)] = var
+            class_vars.append(var)
+            booked.setdefault((day, time_slot, professor), []).append(var)
+            load[professor].append(var)
+            model.AddHint(var, previous.get(cell) == professor)
+            if previous.get(cell) == professor:
+                unchanged.append(var)
+        model.AddExactlyOne(class_vars)
+
+    # A faculty member teaches at most one division at any (day, slot)
+    for (day, time_slot, professor), class_vars in booked.items():
+        model.Add(cp_model.LinearExpr.Sum(class_vars) <= 1 - fixed_booked.get((day, time_slot, professor), 0))
+
+    # Even teaching load across faculty members
+    for professor in professors:
+        low = len(cells) // len(professors) if professor in newcomers else 0
+        model.AddLinearConstraint(cp_model.LinearExpr.Sum(load[professor]),
+                                  low - fixed_load[professor],
+                                  -(-len(cells) // len(professors)) - fixed_load[professor])
+
+    model.Maximize(cp_model.LinearExpr.Sum(unchanged))
+    return model, assignments
+
+# Incremental re-solve of existing timetables after a small change set:
+#   remove_faculty: faculty members who are no longer available
+#   blocked_slots: (division, day, time_slot) cells that must stay free, a division of None blocks every division
+#   add_subjects: Subject objects to add, a faculty member who is not in professors yet joins the pool
+# Only the cells touched by the change set are re-opened first, then their whole (day, slot) columns,
+# then the whole week, until the repair is feasible. Returns the timetables and the solver statistics,
+# including the number of changed assignments.
+def resolve_timetables(previous_timetables, professors, subjects, divisions, classrooms, remove_faculty=(),
+                       blocked_slots=(), add_subjects=(), num_search_workers=NUM_SEARCH_WORKERS,
+                       time_limit=SOLVER_TIME_LIMIT, progress=None):
+    professors = [professor for professor in professors if professor not in remove_faculty]
+    subjects = {professor: list(subjects.get(professor, [])) for professor in professors}
+    for subject in add_subjects:
+        if subject.faculty not in subjects:
+            professors.append(subject.faculty)
+            subjects[subject.faculty] = []
+        subjects[subject.faculty].append(subject)
+
+    blocked = set()
+    for division, day, time_slot in blocked_slots:
+        for blocked_division in ([division] if division is not None else range(1, divisions + 1)):
+            blocked.add((blocked_division, day, time_slot))
+    cells = [cell for cell in all_cells(divisions) if cell not in blocked]
+
+    previous, previous_subjects = previous_assignments(previous_timetables)
+    newcomers = set(professors) - set(previous.values())
+    touched = {cell: professors for cell in cells if previous.get(cell) not in subjects}
+    if newcomers:
+        # Newcomers take their share from the busiest faculty members: those classes may only
+        # stay as they are or move to a newcomer
+        load = {}
+        for cell in cells:
+            load[previous.get(cell)] = load.get(previous.get(cell), 0) + 1
+        busiest = max(load.values())
+        for cell in cells:
+            if cell not in touched and load[previous[cell]] == busiest:
+                touched[cell] = [previous[cell]] + sorted(newcomers)
+    columns = {(day, time_slot) for division, day, time_slot in touched}
+    neighbourhoods = [touched,
+                      {cell: professors for cell in cells if cell[1:] in columns},
+                      {cell: professors for cell in cells}]
+
+    for open_cells in neighbourhoods:
+        build_start = time.perf_counter()
+        model, assignments = build_repair_model(previous, professors, cells, open_cells, newcomers)
+        build_time = time.perf_counter() - build_start
+        METRICS.observe("cpsat_repair_build_seconds", build_time)
+
+        solver = build_solver(num_search_workers, time_limit, presolve=False)
+        status = run_solver(solver, model, progress)
+        METRICS.observe("cpsat_repair_solve_seconds", solver.WallTime())
+        if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
+            break
+
+    stats = solver_stats(solver, status)
+    stats["build_time"] = build_time
+    stats["open_cells"] = len(open_cells)
+    if status != cp_model.OPTIMAL and status != cp_model.FEASIBLE:
+        return {division: Timetable() for division in range(1, divisions + 1)}, stats
+
+    faculty = {cell: previous[cell] for cell in cells if cell not in open_cells}
+    faculty.update(solved_faculty(solver, assignments, professors, open_cells))
+    stats["changed"] = sum(1 for cell in cells if faculty[cell] != previous.get(cell))
+
+    # Unchanged classes keep their subject, unless their faculty member's subject list changed
+    changed_subjects = {subject.faculty for subject in add_subjects}
+    keep_subjects = {}
+    for cell, professor in faculty.items():
+        if professor == previous.get(cell) and professor not in changed_subjects:
+            keep_subjects[cell] = next((subject for subject in subjects[professor]
+                                        if subject.name == previous_subjects[cell]), None)
+    return build_timetables(faculty, subjects, divisions, classrooms, keep_subjects), stats
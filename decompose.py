@@ -0,0 +1,97 @@
+from concurrent.futures import ProcessPoolExecutor
+from engines import DEFAULT_ENGINE, schedule
+from models import Timetable
+
+# Decomposition of an instance into independent subproblems.
+# Divisions are linked when a faculty member teaches both or when they share a classroom;
+# each connected component of that graph is scheduled on its own, in its own process, and the
+# results are merged back into one {division: Timetable}.
+# faculty_divisions maps a faculty member to the divisions they teach, faculty members missing from it
+# teach every division (so without it the whole instance is one component). The engines place every
+# faculty member of a component in every division of it, so each component must be department-style:
+# every one of its faculty members teaches all of its divisions, otherwise components() raises ValueError.
+
+# Function to find the connected components of the sharing graph with union-find,
+# returns a list of (divisions, professors) pairs, sorted by their first division.
+# Raises ValueError for a component that is not department-style.
+def components(professors, divisions, classrooms=None, faculty_divisions=None):
+    faculty_divisions = faculty_divisions or {}
+    parent = list(range(divisions + 1))
+
+    def find(division):
+        while parent[division] != division:
+            parent[division] = parent[parent[division]]
+            division = parent[division]
+        return division
+
+    def union(first, second):
+        parent[find(second)] = find(first)
+
+    taught = {professor: sorted(faculty_divisions.get(professor, range(1, divisions + 1)))
+              for professor in professors}
+    for professor, professor_divisions in taught.items():
+        if not professor_divisions:
+            raise ValueError(f"Faculty member {professor} teaches no division")
+        outside = [division for division in professor_divisions if not 1 <= division <= divisions]
+        if outside:
+            raise ValueError(f"Faculty member {professor} teaches unknown divisions {outside}, "
+                             f"divisions are 1 to {divisions}")
+    for professor_divisions in taught.values():
+        for division in professor_divisions[1:]:
+            union(professor_divisions[0], division)
+    room_division = {}
+    for division, classroom in (classrooms or {}).items():
+        union(room_division.setdefault(classroom, division), division)
+
+    groups = {}
+    for division in range(1, divisions + 1):
+        groups.setdefault(find(division), []).append(division)
+    result = []
+    for group in sorted(groups.values()):
+        group_professors = [professor for professor in professors if set(taught[professor]) & set(group)]
+        if not group_professors:
+            raise ValueError(f"No faculty member teaches division {group[0]}")
+        for professor in group_professors:
+            missing = sorted(set(group) - set(taught[professor]))
+            if missing:
+                raise ValueError(f"Faculty member {professor} does not teach divisions {missing} of the component "
+                                 f"{group}; each faculty member must teach every division linked to theirs")
+        result.append((group, group_professors))
+    return result
+
+# Function to schedule one component as a standalone instance with divisions 1..len(group),
+# then give its timetables and classes their original division numbers back
+def schedule_component(group, professors, subjects, classrooms, engine, seed, options):
+    local_classrooms = {index: classrooms[division] for index, division in enumerate(group, 1)}
+    timetables = schedule(engine, professors, {professor: subjects[professor] for professor in professors},
+                          len(group), local_classrooms, seed, **options)[0]
+
+    merged = {}
+    for index, division in enumerate(group, 1):
+        timetable = timetables.get(index, Timetable())
+        for classes in timetable.classes:
+            for class_ in classes:
+                class_.division = division
+        merged[division] = timetable
+    return merged
+
+# Function to schedule an instance component by component, returns {division: Timetable}.
+# Components run on a process pool of workers processes (default: one per CPU), or one after
+# the other in this process with workers=1, e.g. inside a batch worker.
+def solve_decomposed(professors, subjects, divisions, classrooms=None, faculty_divisions=None, engine=DEFAULT_ENGINE,
+                     seed=None, workers=None, **options):
+    # Default classrooms are named after the original divisions, not the component's own numbering
+    classrooms = classrooms or {division: f"Classroom_{division}" for division in range(1, divisions + 1)}
+    groups = components(professors, divisions, classrooms, faculty_divisions)
+    timetables = {}
+    if len(groups) == 1 or workers == 1:
+        for group, group_professors in groups:
+            timetables.update(schedule_component(group, group_professors, subjects, classrooms, engine, seed, options))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(schedule_component, group, group_professors, subjects, classrooms, engine,
+                                       seed, options)
+                       for group, group_professors in groups]
+            for future in futures:
+                timetables.update(future.result())
+    return dict(sorted(timetables.items()))
@@ -0,0 +1,35 @@
+import importlib
+
+# Registry of scheduler backends: engine name -> (module, function).
+# Modules are only imported the first time their engine is used, so OR-Tools, NumPy and Flask
+# are not paid for by a process that never selects an engine needing them.
+# Every backend is called as function(professors, subjects, divisions, classrooms=..., seed=..., **options)
+# and returns ({division: Timetable}, statistics dict).
+BACKENDS = {
+    "random": ("random_scheduler", "random_scheduling"),
+    "cp-sat": ("cpsat", "solve_timetables"),
+    "ga": ("newminor2", "run_genetic_algorithm"),
+    "hybrid": ("hybrid", "hybrid_scheduling"),
+    "pareto": ("newminor2", "pareto_scheduling"),
+}
+DEFAULT_ENGINE = "cp-sat"
+
+# Function to add or replace a backend, e.g. one living outside this repository
+def register(engine, module, function):
+    BACKENDS[engine] = (module, function)
+
+# Names of the registered engines
+def engine_names():
+    return list(BACKENDS)
+
+# Function to look a backend up, importing its module on first use
+def backend(engine):
+    if engine not in BACKENDS:
+        raise ValueError(f"Unknown engine: {engine}")
+    module, function = BACKENDS[engine]
+    return getattr(importlib.import_module(module), function)
+
+# Function to schedule with an engine, returns the timetables and the engine's statistics
+def schedule(engine, professors, subjects, divisions, classrooms=None, seed=None, **options):
+    classrooms = classrooms or {division: f"Classroom_{division}" for division in range(1, divisions + 1)}
+    return backend(engine)(professors, subjects, divisions, classrooms=classrooms, seed=seed, **options)
@@ -0,0 +1,172 @@
+import argparse
+import csv
+import datetime
+import io
+import json
+import sys
+from timegrid import CALENDAR
+
+# Export of timetables to compact JSON, CSV and iCalendar.
+# Every exporter is a generator of text chunks over a stream of (division, day, class) records, so
+# output is written or sent while it is produced and never held in memory as a whole. Records come
+# from a {division: Timetable} dict (timetable_records) or straight from the timetable store.
+FORMATS = {"json": "application/json", "csv": "text/csv", "ics": "text/calendar"}
+CSV_COLUMNS = ["division", "day", "slot", "time", "faculty", "subject", "classroom", "name"]
+CLASS_MINUTES = 60  # Length of a class in the calendar feeds
+WEEKDAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+TIME_FORMATS = ["%I:%M %p", "%H:%M"]
+ICAL_LINE_OCTETS = 75
+
+# Generator of (division, day, class) records of a {division: Timetable} dict, in division, day, slot order.
+# Records of other faculty members or divisions are skipped when faculty or division is given.
+def timetable_records(timetables, faculty=None, division=None):
+    for record_division, timetable in sorted(timetables.items()):
+        if division is not None and record_division != division:
+            continue
+        for day, classes in enumerate(timetable.classes):
+            for class_ in classes:
+                if faculty is None or class_.faculty == faculty:
+                    yield record_division, day, class_
+
+# Compact JSON: {division: {day name: [class, ...]}}, records must come grouped by division then day
+def export_json(records):
+    division = day = None
+    yield "{"
+    for record_division, record_day, class_ in records:
+        if record_division != division:
+            if division is not None:
+                yield "]},"
+            yield f'"{record_division}":{{{json.dumps(CALENDAR.day_names[record_day])}:['
+            division, day = record_division, record_day
+        elif record_day != day:
+            yield f'],{json.dumps(CALENDAR.day_names[record_day])}:['
+            day = record_day
+        else:
+            yield ","
+        yield json.dumps({"slot": class_.slot, "time": class_.time, "name": class_.name, "faculty": class_.faculty,
+                          "subject": class_.subject, "classroom": class_.classroom}, separators=(",", ":"))
+    if division is not None:
+        yield "]}"
+    yield "}"
+
+# CSV with a header row and one row per class
+def export_csv(records):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    for division, day, class_ in records:
+        writer.writerow([division, CALENDAR.day_names[day], class_.slot, class_.time, class_.faculty, class_.subject,
+                         class_.classroom, class_.name])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+# Function to escape a text value of an iCalendar property
+def ical_text(value):
+    return (str(value).replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\n", "\\n"))
+
+# Function to fold an iCalendar content line at 75 octets, as RFC 5545 requires
+def ical_line(line):
+    encoded = line.encode()
+    if len(encoded) <= ICAL_LINE_OCTETS:
+        return line + "\r\n"
+    parts = []
+    while len(encoded) > ICAL_LINE_OCTETS:
+        cut = ICAL_LINE_OCTETS - (1 if parts else 0)
+        while cut and (encoded[cut] & 0xC0) == 0x80:  # Never split a UTF-8 character
+            cut -= 1
+        parts.append(encoded[:cut].decode())
+        encoded = encoded[cut:]
+    parts.append(encoded.decode())
+    return "\r\n ".join(parts) + "\r\n"
+
+# Function to parse a slot time of the calendar
+def parse_time(text):
+    for time_format in TIME_FORMATS:
+        try:
+            return datetime.datetime.strptime(text.strip(), time_format).time()
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised slot time: {text}")
+
+# First date on or after start that falls on a calendar day
+def first_date(start, day):
+    name = CALENDAR.day_names[day]
+    weekday = WEEKDAY_NAMES.index(name) if name in WEEKDAY_NAMES else day % 7
+    return start + datetime.timedelta(days=(weekday - start.weekday()) % 7)
+
+# iCalendar feed with one weekly recurring event per class, starting in the week of start (default: today).
+# weeks limits the recurrence, classes repeat with no end date otherwise.
+def export_ical(records, name="Timetable", start=None, weeks=None, duration=CLASS_MINUTES):
+    start = start or datetime.date.today()
+    stamp = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    length = datetime.timedelta(minutes=duration)
+    rule = "RRULE:FREQ=WEEKLY" + (f";COUNT={weeks}" if weeks else "")
+    for line in ("BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//Timetable Generator//EN", "CALSCALE:GREGORIAN",
+                 f"X-WR-CALNAME:{ical_text(name)}"):
+        yield ical_line(line)
+    for division, day, class_ in records:
+        begin = datetime.datetime.combine(first_date(start, day), parse_time(class_.time))
+        lines = ["BEGIN:VEVENT",
+                 f"UID:{ical_text(f'{division}-{day}-{class_.slot}-{class_.faculty}')}@timetable-generator",
+                 f"DTSTAMP:{stamp}",
+                 f"DTSTART:{begin:%Y%m%dT%H%M%S}",
+                 f"DTEND:{begin + length:%Y%m%dT%H%M%S}",
+                 rule,
+                 f"SUMMARY:{ical_text(class_.subject)}",
+                 f"LOCATION:{ical_text(class_.classroom)}",
+                 f"DESCRIPTION:{ical_text(f'Division {division}, {class_.faculty}')}",
+                 "END:VEVENT"]
+        yield "".join(ical_line(line) for line in lines)
+    yield ical_line("END:VCALENDAR")
+
+# Function to pick the exporter of a format, options other than those of iCalendar are ignored
+def exporter(export_format, records, **options):
+    if export_format == "json":
+        return export_json(records)
+    if export_format == "csv":
+        return export_csv(records)
+    if export_format == "ics":
+        return export_ical(records, **options)
+    raise ValueError(f"Unknown export format: {export_format}")
+
+# Function to write the export of a {division: Timetable} dict to a file object, chunk by chunk
+def export_timetables(timetables, export_format, file, faculty=None, division=None, **options):
+    for chunk in exporter(export_format, timetable_records(timetables, faculty, division), **options):
+        file.write(chunk)
+
+def main():
+    from timetable_store import STORE_PATH, TimetableStore
+
+    parser = argparse.ArgumentParser(description="Export a stored timetable as JSON, CSV or iCalendar.")
+    parser.add_argument("format", choices=FORMATS)
+    parser.add_argument("timetable", nargs="?", default="latest", help="stored timetable id (default: latest)")
+    parser.add_argument("--store", default=STORE_PATH, help="timetable store (SQLite file)")
+    parser.add_argument("--faculty", help="only the classes of this faculty member")
+    parser.add_argument("--division", type=int, help="only the classes of this division")
+    parser.add_argument("--start", type=datetime.date.fromisoformat, help="first week of the calendar feed")
+    parser.add_argument("--weeks", type=int, help="number of weeks of the calendar feed")
+    parser.add_argument("--output", help="write to this file instead of stdout")
+    args = parser.parse_args()
+
+    store = TimetableStore(args.store)
+    timetable_id = store.latest_id() if args.timetable == "latest" else int(args.timetable)
+    if timetable_id is None or not store.exists(timetable_id):
+        print(f"Unknown timetable: {args.timetable}", file=sys.stderr)
+        return 1
+
+    records = store.records(timetable_id, faculty=args.faculty, division=args.division)
+    options = {"name": f"Timetable {timetable_id}", "start": args.start, "weeks": args.weeks}
+    file = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        for chunk in exporter(args.format, records, **options):
+            file.write(chunk)
+    finally:
+        if args.output:
+            file.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+import time
+import numpy as np
+from constraints import FACULTY_GAP_WEIGHT, faculty_gaps
+from cpsat import NUM_SEARCH_WORKERS, solve_timetables
+from metrics import METRICS
+from newminor2 import (POPULATION_SIZE, NUM_GENERATIONS, EMPTY_GENE, SLOTS_PER_DAY, Convergence,
+                       build_constraint_model, build_gene_table, decode_timetables, default_classrooms,
+                       encode_timetables, fitness_function, generate_initial_population, run_genetic_algorithm)
+from timegrid import CALENDAR
+
+# Hybrid scheduler in three stages:
+#  1. CP-SAT, with a short time limit, finds timetables without clashes and with an even faculty load
+#  2. the GA or a simulated-annealing local search improves the soft constraints from there:
+#     subject hours, faculty load and, for the local search, faculty gaps (idle slots between classes)
+#  3. the best timetables come back as {division: Timetable}, like every other scheduler
+REFINE_METHODS = ("anneal", "ga")
+DEFAULT_REFINE = "anneal"
+CP_SAT_TIME_LIMIT = 5.0  # seconds, only a feasible seed is needed
+REFINE_TIME_LIMIT = 10.0  # seconds
+ANNEAL_ITERATIONS = 2000
+NEIGHBOURS = 32  # Candidate moves scored together at every iteration
+# Share of each kind of move: swap two classes of a division's day, give a class another subject
+# of its faculty member, exchange the classes of two divisions at the same (day, slot)
+MOVE_SHARES = (0.4, 0.2, 0.4)
+START_TEMPERATURE = 2.0
+COOLING = 0.998
+
+# Fitness of the local search: the GA fitness minus the weighted faculty gaps
+def hybrid_fitness(population, model):
+    return fitness_function(population, model) - FACULTY_GAP_WEIGHT * faculty_gaps(model.faculty_occupancy(population))
+
+# Function to build count neighbours of a genome, each one move (see MOVE_SHARES) away from it.
+# Subject changes and exchanges between divisions keep every faculty member's bookings, and so
+# a clash-free seed, as they are; swaps within a day may move a faculty member onto a busy slot.
+def neighbourhood(genome, gene_start, gene_count, model, rng, count):
+    divisions = genome.shape[0]
+    population = np.repeat(genome[None], count, axis=0)
+    individual = np.arange(count)
+    division1 = rng.integers(0, divisions, count)
+    division2 = (division1 + 1 + rng.integers(0, max(divisions - 1, 1), count)) % divisions
+    day = rng.choice(CALENDAR.teaching_days, count)
+    num_slots = SLOTS_PER_DAY[day]
+    slot1 = (rng.random(count) * num_slots).astype(np.int64)
+    slot2 = (slot1 + 1 + (rng.random(count) * (num_slots - 1)).astype(np.int64)) % num_slots
+    move = rng.choice(len(MOVE_SHARES), count, p=MOVE_SHARES)
+
+    swap = move == 0
+    cell1 = (individual[swap], division1[swap], day[swap], slot1[swap])
+    cell2 = (individual[swap], division1[swap], day[swap], slot2[swap])
+    population[cell1], population[cell2] = population[cell2], population[cell1]
+
+    change = move == 1
+    cell = (individual[change], division1[change], day[change], slot1[change])
+    faculty = model.gene_faculty[population[cell]]
+    population[cell] = gene_start[faculty] + (rng.random(len(faculty)) * gene_count[faculty]).astype(np.int32)
+
+    exchange = move == 2
+    cell1 = (individual[exchange], division1[exchange], day[exchange], slot1[exchange])
+    cell2 = (individual[exchange], division2[exchange], day[exchange], slot1[exchange])
+    population[cell1], population[cell2] = population[cell2], population[cell1]
+    return population
+
+# Function to build a GA population from a genome: the genome itself, then copies with every class
+# given a random subject of its faculty member. The faculty layout, and so its feasibility, is kept.
+def subject_variants(genome, gene_start, gene_count, model, rng, count):
+    population = np.repeat(genome[None], count, axis=0)
+    filled = population != EMPTY_GENE
+    filled[0] = False
+    faculty = model.gene_faculty[population[filled]]
+    population[filled] = gene_start[faculty] + (rng.random(len(faculty)) * gene_count[faculty]).astype(np.int32)
+    return population
+
+# Simulated annealing from a genome: every iteration moves to the best of a batch of neighbours,
+# a worse one only with a probability shrinking with the temperature.
+# Returns the best genome, its hybrid fitness and the number of iterations run.
+def anneal(genome, gene_start, gene_count, model, rng, iterations=ANNEAL_ITERATIONS, time_limit=REFINE_TIME_LIMIT,
+           temperature=START_TEMPERATURE, progress=None):
+    current = best = genome
+    current_fitness = best_fitness = hybrid_fitness(genome[None], model)[0]
+    started = time.perf_counter()
+    iteration = 0
+    while iteration < iterations and best_fitness < 0:
+        if time_limit is not None and time.perf_counter() - started >= time_limit:
+            break
+        candidates = neighbourhood(current, gene_start, gene_count, model, rng, NEIGHBOURS)
+        fitness = hybrid_fitness(candidates, model)
+        choice = fitness.argmax()
+        if (fitness[choice] >= current_fitness
+                or rng.random() < np.exp((fitness[choice] - current_fitness) / temperature)):
+            current, current_fitness = candidates[choice], fitness[choice]
+            if current_fitness > best_fitness:
+                best, best_fitness = current, current_fitness
+        temperature *= COOLING
+        iteration += 1
+        if progress is not None and iteration % 100 == 0:
+            progress(phase="refining", iteration=iteration, iterations=iterations, best_fitness=float(best_fitness))
+    return best, float(best_fitness), iteration
+
+# Function to find the seed genome with CP-SAT, falling back to the round-robin layout of the GA
+# when the solver finds no solution within its time limit. Returns the genome and the solver statistics.
+def seed_genome(professors, subjects, divisions, classrooms, genes, rng, time_limit, num_search_workers, seed,
+                progress=None):
+    timetables, stats = solve_timetables(professors, subjects, divisions, classrooms, num_search_workers,
+                                         time_limit, seed=seed, progress=progress)
+    if stats["status"] in ("OPTIMAL", "FEASIBLE"):
+        return encode_timetables(timetables, genes, divisions), stats
+    return generate_initial_population(professors, subjects, divisions, 1, rng)[0], stats
+
+# Hybrid scheduling: CP-SAT seed refined by the GA or simulated annealing (refine = "ga" or "anneal").
+# Returns the timetables and the statistics of the run.
+def hybrid_scheduling(professors, subjects, divisions, classrooms=None, refine=DEFAULT_REFINE, seed=None,
+                      cp_sat_time_limit=CP_SAT_TIME_LIMIT, time_limit=REFINE_TIME_LIMIT,
+                      num_search_workers=NUM_SEARCH_WORKERS, iterations=ANNEAL_ITERATIONS,
+                      population_size=POPULATION_SIZE, num_generations=NUM_GENERATIONS, subject_hours=None,
+                      progress=None):
+    if refine not in REFINE_METHODS:
+        raise ValueError(f"Unknown refine method: {refine}")
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    classrooms = classrooms or default_classrooms(divisions)
+    genes, gene_start, gene_count = build_gene_table(professors, subjects)
+    model = build_constraint_model(professors, subjects, divisions, classrooms, subject_hours)
+
+    with METRICS.timer("hybrid_stage_seconds", stage="seed"):
+        genome, solver_stats = seed_genome(professors, subjects, divisions, classrooms, genes, rng,
+                                           cp_sat_time_limit, num_search_workers, seed, progress)
+    stats = {
+        "seed": "cp-sat" if solver_stats["status"] in ("OPTIMAL", "FEASIBLE") else "round-robin",
+        "cp_sat_status": solver_stats["status"],
+        "refine": refine,
+        "seed_fitness": float(fitness_function(genome[None], model)[0]),
+    }
+    if progress is not None:
+        progress(phase="refining", seed=stats["seed"], seed_fitness=stats["seed_fitness"])
+
+    with METRICS.timer("hybrid_stage_seconds", stage=refine):
+        if refine == "anneal":
+            genome, stats["hybrid_fitness"], stats["iterations"] = anneal(genome, gene_start, gene_count, model, rng,
+                                                                          iterations, time_limit, progress=progress)
+            timetables = decode_timetables(genome, genes, classrooms)
+        else:
+            # A seeded population starts out far less diverse than a random one, so diversity is not
+            # a stop criterion here; the time limit is
+            population = subject_variants(genome, gene_start, gene_count, model, rng, population_size)
+            convergence = Convergence(time_budget=time_limit, min_diversity=None)
+            timetables, ga_stats = run_genetic_algorithm(professors, subjects, divisions, population_size,
+                                                         num_generations, seed, classrooms=classrooms,
+                                                         subject_hours=subject_hours, convergence=convergence,
+                                                         initial_population=population, progress=progress)
+            genome = encode_timetables(timetables, genes, divisions)
+            stats["generations"] = ga_stats["generations"]
+            stats["stopped"] = ga_stats["stopped"]
+
+    stats["best_fitness"] = float(fitness_function(genome[None], model)[0])
+    stats["faculty_gaps"] = int(faculty_gaps(model.faculty_occupancy(genome[None]))[0])
+    stats["wall_time"] = time.perf_counter() - started
+    return timetables, stats
@@ -0,0 +1,401 @@
+import itertools
+import json
+import os
+import re
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from metrics import METRICS, run_profiled
+from models import Subject
+from result_cache import request_key
+
+# Number of generation jobs that may run at once, the rest wait in the queue
+JOB_WORKERS = int(os.environ.get("TIMETABLE_JOB_WORKERS", 2))
+# Jobs waiting or running beyond this are refused instead of piling up
+MAX_PENDING_JOBS = int(os.environ.get("TIMETABLE_MAX_PENDING_JOBS", 32))
+# Finished jobs kept around for polling and result download
+MAX_FINISHED_JOBS = 256
+STREAM_KEEPALIVE = 15.0  # seconds
+# Directory of the job status files shared by the worker processes of a server (see serve.py)
+JOB_DIR = os.environ.get("TIMETABLE_JOB_DIR",
+                         os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "jobs"))
+PUBLISH_INTERVAL = 0.5  # seconds between status file writes for progress reports, status changes are always written
+SHARED_POLL_INTERVAL = 0.5  # seconds between reads of the status file of a job running in another worker
+JOB_ID_PATTERN = re.compile(r"[0-9a-f]{32}")  # uuid4().hex
+
+PROFILE_MODES = ("cprofile", "tracemalloc")
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+class QueueFull(Exception):
+    pass
+
+# A single generation job; progress is a dict of the latest values reported by the scheduler.
+# key is the result cache key the job's result is stored under, so that other workers can serve it.
+# With a directory, every change is also published to a status file there for the other workers.
+class Job:
+    def __init__(self, name, profile=None, key=None, directory=None):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.profile = profile
+        self.key = key
+        self.directory = directory
+        self.published = 0.0
+        self.profile_report = None
+        self.status = QUEUED
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.version = 0
+        self.changed = threading.Condition()
+
+    def update(self, **fields):
+        with self.changed:
+            for key, value in fields.items():
+                setattr(self, key, value)
+            self.version += 1
+            self.changed.notify_all()
+        self.publish()
+
+    # Progress callback handed to the scheduler
+    def report(self, **progress):
+        with self.changed:
+            self.progress = dict(self.progress, **progress)
+            self.version += 1
+            self.changed.notify_all()
+        if time.time() - self.published >= PUBLISH_INTERVAL:
+            self.publish()
+
+    # Function to write the job's status file, replaced atomically so readers never see a partial file
+    def publish(self):
+        if self.directory is None:
+            return
+        with self.changed:
+            state = {"job": self.to_dict(), "key": self.key, "version": self.version,
+                     "profile_report": self.profile_report}
+            self.published = time.time()
+        # The directory is created by the first publish, not when an app creates its queue
+        os.makedirs(self.directory, exist_ok=True)
+        path = status_path(self.directory, self.id)
+        temporary = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary, "w") as file:
+            json.dump(state, file)
+        os.replace(temporary, path)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "status": self.status,
+            "progress": self.progress,
+            "error": self.error,
+            "profile": self.profile,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+        }
+
+    # Generator of server-sent events, one per progress change, until the job finishes
+    def stream(self):
+        seen = -1
+        while True:
+            with self.changed:
+                if self.version == seen:
+                    self.changed.wait(STREAM_KEEPALIVE)
+                if self.version == seen:
+                    event = ": keepalive\n\n"
+                else:
+                    seen = self.version
+                    event = f"data: {json.dumps(self.to_dict())}\n\n"
+                finished = self.status in (DONE, FAILED)
+            yield event
+            if finished:
+                return
+
+# Function to build the status file path of a job id, None for anything that is not a job id
+def status_path(directory, job_id):
+    if not JOB_ID_PATTERN.fullmatch(job_id):
+        return None
+    return os.path.join(directory, f"{job_id}.json")
+
+# Function to read a status file, returns its state or None when there is no such job
+def read_status(directory, job_id):
+    path = status_path(directory, job_id)
+    if path is None:
+        return None
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+# Read-only view of a job running in, or finished by, another worker process, read from its status file.
+# It has the attributes of a Job the routes use; the result itself is fetched from the result cache by key.
+class SharedJob:
+    def __init__(self, directory, job_id, state):
+        self.directory = directory
+        self.id = job_id
+        self.load(state)
+
+    def load(self, state):
+        for field, value in state["job"].items():
+            setattr(self, field, value)
+        self.key = state["key"]
+        self.version = state["version"]
+        self.profile_report = state["profile_report"]
+        self.result = None
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in ("id", "name", "status", "progress", "error", "profile",
+                                                          "created", "started", "finished")}
+
+    # Generator of server-sent events, polling the status file until the job finishes
+    def stream(self):
+        seen = -1
+        waited = 0.0
+        while True:
+            if self.version != seen:
+                seen = self.version
+                waited = 0.0
+                yield f"data: {json.dumps(self.to_dict())}\n\n"
+            elif waited >= STREAM_KEEPALIVE:
+                waited = 0.0
+                yield ": keepalive\n\n"
+            if self.status in (DONE, FAILED):
+                return
+            time.sleep(SHARED_POLL_INTERVAL)
+            waited += SHARED_POLL_INTERVAL
+            state = read_status(self.directory, self.id)
+            if state is None:  # Evicted by its worker
+                return
+            self.load(state)
+
+# In-process job queue backed by a bounded thread pool.
+# With a directory (JOB_DIR by default, None to keep jobs private) job status is shared through files,
+# so that get() finds the jobs of the other worker processes of a server too.
+class JobQueue:
+    def __init__(self, workers=JOB_WORKERS, max_pending=MAX_PENDING_JOBS, directory=JOB_DIR):
+        self.directory = directory
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="timetable-job")
+        self.max_pending = max_pending
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+        self.counter = itertools.count(1)
+
+    # Function to queue func(*args, progress=job.report, **kwargs); raises QueueFull when saturated.
+    # profile is None or one of PROFILE_MODES, the report is kept on the job; key is the result cache key.
+    def submit(self, func, *args, profile=None, key=None, **kwargs):
+        if profile is not None and profile not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {profile}")
+        with self.lock:
+            pending = sum(1 for job in self.jobs.values() if job.status in (QUEUED, RUNNING))
+            if pending >= self.max_pending:
+                METRICS.increment("jobs_rejected_total")
+                raise QueueFull(f"{pending} generation jobs are already pending")
+            job = Job(f"job-{next(self.counter)}", profile, key, self.directory)
+            self.jobs[job.id] = job
+            self.evict()
+        job.publish()
+        self.executor.submit(self.run, job, func, args, kwargs)
+        return job
+
+    # Function to record a job whose result is already known, e.g. served from the result cache
+    def completed(self, result, key=None):
+        with self.lock:
+            job = Job(f"job-{next(self.counter)}", key=key, directory=self.directory)
+            job.status = DONE
+            job.result = result
+            job.started = job.finished = job.created
+            self.jobs[job.id] = job
+            self.evict()
+        job.publish()
+        return job
+
+    def run(self, job, func, args, kwargs):
+        job.update(status=RUNNING, started=time.time())
+        METRICS.observe("job_wait_seconds", job.started - job.created)
+        try:
+            if job.profile is None:
+                result = func(*args, progress=job.report, **kwargs)
+            else:
+                result, report = run_profiled(job.profile, func, *args, progress=job.report, **kwargs)
+                job.update(profile_report=report)
+        except Exception:
+            job.update(status=FAILED, error=traceback.format_exc(limit=5), finished=time.time())
+        else:
+            job.update(status=DONE, result=result, finished=time.time())
+        METRICS.observe("job_run_seconds", job.finished - job.started)
+        METRICS.increment("jobs_total", status=job.status)
+
+    # Function to look a job up: one of this process, else one shared by another worker, else None
+    def get(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+        if job is not None or not self.directory:
+            return job
+        state = read_status(self.directory, job_id)
+        return SharedJob(self.directory, job_id, state) if state is not None else None
+
+    # Function to drop the oldest finished jobs beyond MAX_FINISHED_JOBS
+    def evict(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.status in (DONE, FAILED)]
+        for job_id in finished[:max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+            del self.jobs[job_id]
+            if self.directory:
+                try:
+                    os.remove(status_path(self.directory, job_id))
+                except OSError:
+                    pass
+
+# Function to read the fields every generation form has:
+# returns professors, subjects, divisions, time quantum, classrooms and seed
+def read_generation_form(form):
+    num_faculty = int(form["num_faculty"])
+    professors = []
+    subjects = {}
+    for i in range(num_faculty):
+        professor_name = form[f"faculty_{i + 1}_name"]
+        professors.append(professor_name)
+        subjects[professor_name] = []
+        num_subjects = int(form[f"faculty_{i + 1}_subjects"])
+        for j in range(num_subjects):
+            subject_name = form[f"faculty_{i + 1}_subject_{j + 1}"]
+            subjects[professor_name].append(Subject(subject_name, professor_name))
+
+    divisions = int(form["divisions"])
+    time_quantum = int(form["time_quantum"])
+    classrooms = {division: form.get(f"division_{division}_classroom") or f"Classroom_{division}"
+                  for division in range(1, divisions + 1)}
+    seed = int(form["seed"]) if form.get("seed") else None
+    return professors, subjects, divisions, time_quantum, classrooms, seed
+
+# Header telling clients whether the response was served from the result cache
+def cache_header(hit):
+    return {"X-Timetable-Cache": "hit" if hit else "miss"}
+
+# Function to add the generation job layer to a Flask app:
+#   POST /generate                 generate the submitted form, redirects to the result page
+#   POST /jobs                     queue the submitted form, returns the job id and its urls
+#   GET  /jobs/<job_id>            status and progress of a job
+#   GET  /jobs/<job_id>/events     progress as server-sent events
+#   GET  /jobs/<job_id>/profile    profiler report of a job submitted with a "profile" field
+#   GET  /jobs/<job_id>/result     the timetable, the progress page until it is done
+# The app supplies what differs between apps:
+#   read_request(form) returns (engine, professors, subjects, divisions, classrooms, seed, options), all of it
+#   part of the result cache key;
+#   generate(engine, professors, subjects, divisions, classrooms, seed, progress=..., **options) returns
+#   ({division: Timetable}, statistics dict).
+# Identical requests are served from the result cache. Results are kept in the cache and the store, empty
+# results are not kept; the other members of a Pareto set are stored as alternatives.
+# protect decorates every view, e.g. flask_login.login_required on an app behind a login.
+def register_job_routes(app, queue, cache, store, read_request, generate, protect=None):
+    from flask import Response, jsonify, redirect, render_template, request, url_for
+    from rendering import stream_timetables
+
+    protect = protect or (lambda view: view)
+
+    # Function run as a job: generate the timetables and keep them
+    def generate_and_keep(key, engine, professors, subjects, divisions, classrooms, seed, options, progress=None):
+        with METRICS.timer("schedule_seconds", engine=engine):
+            timetables, stats = generate(engine, professors, subjects, divisions, classrooms, seed, progress=progress,
+                                         **options)
+        if any(classes for timetable in timetables.values() for classes in timetable.classes):
+            cache.put(key, timetables)
+            timetable_id = store.save(timetables, key=key, engine=engine)
+            if progress is not None:
+                progress(stored=timetable_id)
+            if "pareto_timetables" in stats:
+                alternatives = [store.save(alternative, name=f"Pareto {index + 1}: " + ", ".join(
+                                    f"{name} {value:g}" for name, value in stats["pareto_front"][index].items()),
+                                    engine=engine)
+                                if index != stats["chosen"] else timetable_id
+                                for index, alternative in enumerate(stats["pareto_timetables"])]
+                if progress is not None:
+                    progress(pareto=alternatives)
+        return timetables
+
+    # Function to queue a generation job for the submitted form, returns the job and whether it was a cache hit.
+    # A "profile" form field of cprofile or tracemalloc runs the job under that profiler.
+    def submit_generation_job(form):
+        engine, professors, subjects, divisions, classrooms, seed, options = read_request(form)
+        profile = form.get("profile") if form.get("profile") in PROFILE_MODES else None
+        key = request_key(engine, professors, subjects, divisions, classrooms, seed, **options)
+        timetables = cache.get(key) if profile is None else None
+        METRICS.increment("result_cache_requests_total", result="miss" if timetables is None else "hit")
+        if timetables is not None:
+            return queue.completed(timetables, key), True
+        return queue.submit(generate_and_keep, key, engine, professors, subjects, divisions, classrooms, seed,
+                            options, profile=profile, key=key), False
+
+    @app.route("/generate", methods=["POST"])
+    @protect
+    def generate_timetable():
+        try:
+            job, hit = submit_generation_job(request.form)
+        except QueueFull as error:
+            return render_template("job_status.html", job=None, error=str(error)), 503
+        if hit:
+            return stream_timetables(job.result, headers=cache_header(hit))
+        return redirect(url_for("job_result", job_id=job.id)), 302, cache_header(hit)
+
+    @app.route("/jobs", methods=["POST"])
+    @protect
+    def submit_job():
+        try:
+            job, hit = submit_generation_job(request.form)
+        except QueueFull as error:
+            return jsonify(error=str(error)), 503
+        return jsonify(id=job.id, status_url=url_for("job_status", job_id=job.id),
+                       events_url=url_for("job_events", job_id=job.id),
+                       result_url=url_for("job_result", job_id=job.id)), 200 if hit else 202, cache_header(hit)
+
+    @app.route("/jobs/<job_id>")
+    @protect
+    def job_status(job_id):
+        job = queue.get(job_id)
+        if job is None:
+            return jsonify(error="unknown job"), 404
+        return jsonify(job.to_dict())
+
+    @app.route("/jobs/<job_id>/events")
+    @protect
+    def job_events(job_id):
+        job = queue.get(job_id)
+        if job is None:
+            return jsonify(error="unknown job"), 404
+        return Response(job.stream(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+    @app.route("/jobs/<job_id>/profile")
+    @protect
+    def job_profile(job_id):
+        job = queue.get(job_id)
+        if job is None or job.profile is None:
+            return jsonify(error="no profile for this job"), 404
+        if job.profile_report is None:
+            return jsonify(job.to_dict()), 202
+        return Response(job.profile_report, mimetype="text/plain")
+
+    # A job of another worker process (serve.py) has its result read from the shared result cache;
+    # a finished job with nothing there generated no timetable (empty results are not cached).
+    @app.route("/jobs/<job_id>/result")
+    @protect
+    def job_result(job_id):
+        job = queue.get(job_id)
+        if job is None:
+            return render_template("job_status.html", job=None, error="Unknown job"), 404
+        if job.status != DONE:
+            return render_template("job_status.html", job=job, error=job.error), 500 if job.status == FAILED else 202
+
+        timetables = job.result if job.result is not None else cache.get(job.key) if job.key else None
+        if timetables is None:
+            return render_template("job_status.html", job=job, error="No timetable was generated"), 404
+        return stream_timetables(timetables)
@@ -0,0 +1,124 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Histogram buckets in seconds, from sub-millisecond generation phases to long solver runs
+BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+PROFILE_LINES = 40  # Rows kept from a cProfile or tracemalloc report
+
+# Process-wide timers and counters, exposed in the Prometheus text format by render().
+# Metrics are keyed by name and label values; worker processes keep their own registry.
+class Metrics:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.histograms = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    # Function to record one observation (in seconds) in a histogram
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [[0] * len(self.buckets), 0, 0.0]
+            counts = histogram[0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+            histogram[1] += 1
+            histogram[2] += value
+
+    def increment(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    # Context manager timing its block into a histogram
+    @contextmanager
+    def timer(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    # Function to render every metric in the Prometheus text exposition format
+    def render(self):
+        def label_text(labels, extra=()):
+            pairs = [f'{key}="{value}"' for key, value in labels + tuple(extra)]
+            return "{" + ",".join(pairs) + "}" if pairs else ""
+
+        lines = []
+        with self.lock:
+            for name in sorted({name for name, labels in self.counters}):
+                lines.append(f"# TYPE {name} counter")
+                for (metric, labels), value in sorted(self.counters.items()):
+                    if metric == name:
+                        lines.append(f"{name}{label_text(labels)} {value}")
+            for name in sorted({name for name, labels in self.histograms}):
+                lines.append(f"# TYPE {name} histogram")
+                for (metric, labels), (counts, count, total) in sorted(self.histograms.items()):
+                    if metric != name:
+                        continue
+                    for bound, bucket_count in zip(self.buckets, counts):
+                        lines.append(f"{name}_bucket{label_text(labels, [('le', bound)])} {bucket_count}")
+                    lines.append(f"{name}_bucket{label_text(labels, [('le', '+Inf')])} {count}")
+                    lines.append(f"{name}_sum{label_text(labels)} {total}")
+                    lines.append(f"{name}_count{label_text(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+METRICS = Metrics()
+
+# Only one profiler or allocation trace can run in a process at a time
+profile_lock = threading.Lock()
+
+# Function to run func under cProfile or tracemalloc, returns the result and a text report.
+# The profilers are imported here, so that the apps do not load them at startup.
+def run_profiled(mode, func, *args, **kwargs):
+    import cProfile
+    import io
+    import pstats
+    import tracemalloc
+
+    with profile_lock:
+        if mode == "cprofile":
+            profiler = cProfile.Profile()
+            result = profiler.runcall(func, *args, **kwargs)
+            report = io.StringIO()
+            pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(PROFILE_LINES)
+            return result, report.getvalue()
+        if mode == "tracemalloc":
+            tracemalloc.start()
+            try:
+                result = func(*args, **kwargs)
+                snapshot = tracemalloc.take_snapshot()
+                current, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            lines = [f"current {current / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB"]
+            lines += [str(stat) for stat in snapshot.statistics("lineno")[:PROFILE_LINES]]
+            return result, "\n".join(lines) + "\n"
+    raise ValueError(f"Unknown profile mode: {mode}")
+
+# Function to time every request of a Flask app and serve the metrics at /metrics
+def instrument_app(app, metrics=METRICS):
+    from flask import Response, g, request
+
+    @app.before_request
+    def start_timer():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop("request_start", None)
+        if start is not None:
+            metrics.observe("http_request_seconds", time.perf_counter() - start,
+                            endpoint=request.endpoint or "unknown", method=request.method)
+            metrics.increment("http_requests_total", endpoint=request.endpoint or "unknown",
+                              status=response.status_code)
+        return response
+
+    @app.route("/metrics")
+    def metrics_endpoint():
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
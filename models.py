@@ -0,0 +1,46 @@
+import sys
+from timegrid import CALENDAR
+
+MAX_DAYS = CALENDAR.num_days
+# Default display name of a class, formatted on access
+CLASS_NAME_FORMAT = "{subject}_{faculty}_{division}"
+
+# Timetable data classes shared by the schedulers.
+# They use __slots__ instead of a per-instance __dict__, and names are interned, so every
+# class of a timetable points at the same few string objects instead of holding its own copies.
+
+class Subject:
+    __slots__ = ("name", "faculty")
+
+    def __init__(self, name, faculty):
+        self.name = sys.intern(name)
+        self.faculty = sys.intern(faculty)
+
+class Class:
+    __slots__ = ("slot", "time", "faculty", "subject", "division", "classroom", "name_format")
+
+    # slot is the calendar slot id of the class, time its display time
+    def __init__(self, slot, time, faculty, subject, division, classroom, name_format=CLASS_NAME_FORMAT):
+        self.slot = slot
+        self.time = sys.intern(time)
+        self.faculty = sys.intern(faculty)
+        self.subject = sys.intern(subject)
+        self.division = division
+        self.classroom = sys.intern(classroom)
+        self.name_format = name_format
+
+    # Display name, only built when it is shown
+    @property
+    def name(self):
+        return self.name_format.format(subject=self.subject, faculty=self.faculty, division=self.division)
+
+class Timetable:
+    __slots__ = ("classes",)
+
+    def __init__(self):
+        self.classes = [[] for _ in range(MAX_DAYS)]
+
+    # Number of classes of each day
+    @property
+    def num_classes(self):
+        return [len(classes) for classes in self.classes]
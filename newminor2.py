@@ -1,44 +1,72 @@
 import random
-import copy
-
-MAX_DAYS = 7
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+import numpy as np
+from constraints import ConstraintModel, band_penalty, faculty_gaps
+from models import Class, Subject, Timetable
+from timegrid import CALENDAR
+from metrics import METRICS
+
+MAX_DAYS = CALENDAR.num_days
 MAX_NAME_LENGTH = 50
 MAX_SUBJECT_LENGTH = 50
 MAX_DIVISIONS = 5
 POPULATION_SIZE = 20
+PARETO_POPULATION_SIZE = 40  # A front needs room for more than a few trade-offs
 MUTATION_RATE = 0.2
 NUM_GENERATIONS = 100
-
-# Class definitions
-class Class:
-    def __init__(self, name, time, faculty, subject, division, classroom):
-        self.name = name
-        self.time = time
-        self.faculty = faculty
-        self.subject = subject
-        self.division = division
-        self.classroom = classroom
-
-class Timetable:
-    def __init__(self):
-        self.classes = [[] for _ in range(MAX_DAYS)]
-        self.num_classes = [0] * MAX_DAYS
-
-class Subject:
-    def __init__(self, name, faculty):
-        self.name = name
-        self.faculty = faculty
-
-# Function to generate class name
-def generate_class_name(subject, faculty, division):
-    return f"{subject.name}{faculty}{division}"
-
-# Function to simulate input form and generate initial population of timetables
-def generate_initial_population(professors, subjects, divisions, population_size):
-    population = []
-    for _ in range(population_size):
-        timetables = round_robin_scheduling(professors, subjects, divisions)
-        population.append(timetables)
+TOURNAMENT_SIZE = 5
+ELITE_SIZE = 2
+MIN_POPULATION_SIZE = ELITE_SIZE + 2  # Room for the elite and at least one pair of offspring
+PARALLEL_MIN_CHUNK_SIZE = 256  # Rows worth sending to another process, smaller chunks cost more to pickle than to score
+NUM_ISLANDS = 4
+MIGRATION_INTERVAL = 10
+MIGRATION_SIZE = 2
+TARGET_FITNESS = 0  # No violated constraint left
+STALL_GENERATIONS = 30
+MIN_DIVERSITY = 0.002  # Share of cells differing from the best individual, on average
+PRINT_INTERVAL = 10
+EMPTY_GENE = -1
+WEEKLY = MAX_DAYS  # Column of the weekly terms in the score matrix
+
+# Time slots for each day, excluding break times
+TIME_SLOTS = CALENDAR.time_slots
+SLOTS_PER_DAY = np.array(CALENDAR.slots_per_day)
+MAX_SLOTS = CALENDAR.max_slots
+SLOT_MASK = np.arange(MAX_SLOTS)[None, :] < SLOTS_PER_DAY[:, None]
+# Position of every day among the teaching days, -1 for holidays; crossover cuts between teaching days
+TEACHING_POSITION = np.full(MAX_DAYS, -1)
+TEACHING_POSITION[CALENDAR.teaching_days] = np.arange(len(CALENDAR.teaching_days))
+
+# Display name of a class
+CLASS_NAME_FORMAT = "{subject}{faculty}{division}"
+
+# Function to build the (faculty, subject) gene table used by the array genome
+def build_gene_table(professors, subjects):
+    genes = []
+    gene_start = np.zeros(len(professors), dtype=np.int32)
+    gene_count = np.zeros(len(professors), dtype=np.int32)
+    for index, professor in enumerate(professors):
+        gene_start[index] = len(genes)
+        gene_count[index] = len(subjects[professor])
+        for subject in subjects[professor]:
+            genes.append((professor, subject))
+    return genes, gene_start, gene_count
+
+# Function to generate initial population of timetables as one (individual, division, day, slot) array
+def generate_initial_population(professors, subjects, divisions, population_size, rng):
+    genes, gene_start, gene_count = build_gene_table(professors, subjects)
+
+    # Same round-robin faculty layout as round_robin_scheduling, only the subject is random
+    division = np.arange(1, divisions + 1)[:, None, None]
+    day = np.arange(MAX_DAYS)[None, :, None]
+    time_slot = np.arange(MAX_SLOTS)[None, None, :]
+    faculty = (day * SLOTS_PER_DAY[day] * divisions + time_slot * divisions + division) % len(professors)
+
+    offsets = rng.random((population_size, divisions, MAX_DAYS, MAX_SLOTS))
+    population = gene_start[faculty] + (offsets * gene_count[faculty]).astype(np.int32)
+    population[:, :, ~SLOT_MASK] = EMPTY_GENE
     return population
 
 # Round robin scheduling function
@@ -50,17 +78,6 @@ def round_robin_scheduling(professors, subjects, divisions):
     for division in range(1, divisions + 1):
         classrooms[division] = f"Classroom_{division}"
 
-    # Define time slots for each day, excluding break times
-    time_slots = [
-        [],  # Sunday (Holiday)
-        ["8:00 AM", "9:00 AM", "10:00 AM", "11:15 AM", "12:15 PM", "2:00 PM"],  # Monday
-        ["8:00 AM", "9:00 AM", "10:00 AM", "11:15 AM", "12:15 PM", "2:00 PM"],  # Tuesday
-        ["8:00 AM", "9:00 AM", "10:00 AM", "11:15 AM", "12:15 PM", "2:00 PM"],  # Wednesday
-        ["8:00 AM", "9:00 AM", "10:00 AM", "11:15 AM", "12:15 PM", "2:00 PM"],  # Thursday
-        ["8:00 AM", "9:00 AM", "10:00 AM", "11:15 AM", "12:15 PM", "2:00 PM"],  # Friday
-        ["8:00 AM", "9:00 AM", "10:00 AM", "11:15 AM", "12:15 PM"]  # Saturday (Half Day)
-    ]
-
     # Initialize counters for each faculty member
     faculty_counters = {faculty_name: 0 for faculty_name in professors}
 
@@ -68,114 +85,524 @@ def round_robin_scheduling(professors, subjects, divisions):
         timetable = Timetable()
         timetables[division] = timetable
 
-    for day in range(1, MAX_DAYS):  # Start from Monday (index 1)
-        for time_slot in range(len(time_slots[day])):
+    for day in CALENDAR.teaching_days:
+        for time_slot in range(len(TIME_SLOTS[day])):
             for division in range(1, divisions + 1):
                 # Get the faculty member to assign the class to (round-robin)
-                faculty_name = professors[(day * len(time_slots[day]) * divisions + time_slot * divisions + division) % len(professors)]
+                faculty_name = professors[(day * len(TIME_SLOTS[day]) * divisions + time_slot * divisions + division) % len(professors)]
 
                 # Randomly select a subject from the list associated with the faculty
                 subject = random.choice(subjects[faculty_name])
 
-                # Generate a unique class name
-                class_name = generate_class_name(subject, faculty_name, division)
-
                 # Create the class and add it to the timetable
-                class_ = Class(class_name, time_slots[day][time_slot], faculty_name, subject.name, division, classrooms[division])
+                class_ = Class(time_slot, TIME_SLOTS[day][time_slot], faculty_name, subject.name, division, classrooms[division], CLASS_NAME_FORMAT)
                 timetables[division].classes[day].append(class_)
-                timetables[division].num_classes[day] += 1
 
                 # Increment the counter for the assigned faculty member
                 faculty_counters[faculty_name] += 1
 
     return timetables
 
-# Fitness function (example, needs customization based on specific constraints)
-def fitness_function(timetables):
-    fitness = 0
+# Function to reject populations too small to breed any offspring next to the elite
+def check_population_size(population_size):
+    if population_size < MIN_POPULATION_SIZE:
+        raise ValueError(f"population_size must be at least {MIN_POPULATION_SIZE}, got {population_size}")
+
+# Convergence criteria of a run, checked once per generation; the first one that fires stops the run:
+#  - target_fitness: the best individual reached this fitness
+#  - stall: the best fitness did not improve for stall_generations generations
+#  - time_budget: the run took more than time_budget seconds
+#  - diversity: individuals differ from the best one in less than min_diversity of their cells
+# A criterion set to None is not checked.
+class Convergence:
+    def __init__(self, target_fitness=TARGET_FITNESS, stall_generations=STALL_GENERATIONS, time_budget=None,
+                 min_diversity=MIN_DIVERSITY):
+        self.target_fitness = target_fitness
+        self.stall_generations = stall_generations
+        self.time_budget = time_budget
+        self.min_diversity = min_diversity
+        self.start()
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.best_fitness = -np.inf
+        self.best_generation = 0
+        self.reason = None
+
+    # Function to check the criteria after generation, returns the name of the one that fired or None
+    def check(self, generation, fitness, population):
+        best = fitness.max()
+        if best > self.best_fitness:
+            self.best_fitness = best
+            self.best_generation = generation
+
+        if self.target_fitness is not None and best >= self.target_fitness:
+            self.reason = "target_fitness"
+        elif self.stall_generations is not None and generation - self.best_generation >= self.stall_generations:
+            self.reason = "stall"
+        elif self.time_budget is not None and time.perf_counter() - self.started >= self.time_budget:
+            self.reason = "time_budget"
+        elif self.min_diversity is not None:
+            differing = np.count_nonzero(population != population[fitness.argmax()])
+            if differing < self.min_diversity * population[0].size * len(population):
+                self.reason = "diversity"
+        return self.reason
+
+# Function to build the constraint model of an instance
+# classrooms maps division -> classroom, subject_hours maps subject name -> weekly classes per division
+def build_constraint_model(professors, subjects, divisions, classrooms=None, subject_hours=None):
+    genes = build_gene_table(professors, subjects)[0]
+    faculty_index = {professor: index for index, professor in enumerate(professors)}
+    subject_index = {}
+    for professor, subject in genes:
+        subject_index.setdefault(subject.name, len(subject_index))
+    classrooms = classrooms or default_classrooms(divisions)
+    room_index = {}
+    for division in range(1, divisions + 1):
+        room_index.setdefault(classrooms[division], len(room_index))
+
+    if subject_hours is not None:
+        subject_hours = [subject_hours[name] for name in subject_index]
+
+    return ConstraintModel(np.array([faculty_index[professor] for professor, subject in genes]),
+                           np.array([subject_index[subject.name] for professor, subject in genes]),
+                           np.array([room_index[classrooms[division]] for division in range(1, divisions + 1)]),
+                           SLOT_MASK, len(professors), len(subject_index), len(room_index), subject_hours)
+
+# Function to apply a scoring function to an array, split into one chunk per worker of a process pool
+# when one is given, as long as every chunk keeps PARALLEL_MIN_CHUNK_SIZE rows
+def score_chunks(score, array, executor=None, workers=1):
+    num_chunks = min(workers, len(array) // PARALLEL_MIN_CHUNK_SIZE) if executor is not None else 1
+    if num_chunks < 2:
+        return score(array)
+    return np.concatenate(list(executor.map(score, np.array_split(array, num_chunks))))
+
+# Scores of every individual: one column per day (clashes) plus the WEEKLY column
+# (subject hours and faculty load), shape (individuals, days + 1). Fitness is the row sum.
+def fitness_scores(population, model, executor=None, workers=1):
+    blocks = population.transpose(0, 2, 1, 3).reshape(-1, population.shape[1], MAX_SLOTS)
+    scores = np.empty((len(population), WEEKLY + 1))
+    scores[:, :MAX_DAYS] = -score_chunks(model.day_penalties, blocks, executor, workers).reshape(len(population), MAX_DAYS)
+    scores[:, WEEKLY] = -score_chunks(model.weekly_penalties, population, executor, workers)
+    return scores
+
+# Fitness function: weighted penalties of the hard and soft constraints in the model
+def fitness_function(population, model):
+    return fitness_scores(population, model).sum(axis=1)
+
+# Tournament selection (returns the indices of the winners, no individual is copied)
+def tournament_selection(fitness, tournament_size, rng):
+    participants = rng.integers(0, len(fitness), size=(len(fitness), tournament_size))
+    return participants[np.arange(len(fitness)), fitness[participants].argmax(axis=1)]
+
+# Crossover (two-point crossover on teaching days, one pair of parent indices per row)
+# Children are written day block by day block straight into the reusable offspring buffer.
+# Also returns, for every child and day, the index of the parent that day was taken from.
+def crossover(population, parents1, parents2, rng, out):
+    num_teaching_days = len(CALENDAR.teaching_days)
+    point1 = rng.integers(0, num_teaching_days, size=len(parents1))
+    point2 = rng.integers(point1, num_teaching_days + 1)
+
+    swap = (TEACHING_POSITION >= point1[:, None]) & (TEACHING_POSITION < point2[:, None])
+    sources = np.concatenate((np.where(swap, parents2[:, None], parents1[:, None]),
+                              np.where(swap, parents1[:, None], parents2[:, None])))
+
+    inherit_days(population, sources, out, day_axis=2)
+    return out[:len(sources)], sources
+
+# Function to copy every day of per-individual arrays (genomes, scores, occupancy) from the parent
+# listed in sources into the first rows of out
+def inherit_days(array, sources, out, day_axis):
+    middle = (slice(None),) * (day_axis - 1)
+    for day in CALENDAR.teaching_days:  # Holidays stay empty in every buffer
+        out[(slice(0, len(sources)),) + middle + (day,)] = array[(sources[:, day],) + middle + (day,)]
+
+# Mutation (swap mutation of two classes within the same day)
+# Returns the swaps performed as (individual, division, day, slot1, slot2) arrays
+def mutate(population, rng):
+    num_slots = SLOTS_PER_DAY[None, None, :]
+    mutated = (rng.random(population.shape[:3]) < MUTATION_RATE) & (num_slots > 1)
+    individual, division, day = np.nonzero(mutated)
+
+    num_slots = SLOTS_PER_DAY[day]
+    idx1 = (rng.random(len(day)) * num_slots).astype(np.int64)
+    idx2 = (idx1 + 1 + (rng.random(len(day)) * (num_slots - 1)).astype(np.int64)) % num_slots
+
+    class1 = population[individual, division, day, idx1]
+    population[individual, division, day, idx1] = population[individual, division, day, idx2]
+    population[individual, division, day, idx2] = class1
+    return individual, division, day, idx1, idx2
+
+# Function to build the default classroom of every division
+def default_classrooms(divisions):
+    return {division: f"Classroom_{division}" for division in range(1, divisions + 1)}
+
+# Function to build the genome of timetables of any scheduler, the inverse of decode_timetables.
+# Classes whose (faculty, subject) is not in the gene table are left empty.
+def encode_timetables(timetables, genes, divisions):
+    gene_index = {(professor, subject.name): gene for gene, (professor, subject) in enumerate(genes)}
+    genome = np.full((divisions, MAX_DAYS, MAX_SLOTS), EMPTY_GENE, dtype=np.int32)
     for division, timetable in timetables.items():
-        for day in range(1, MAX_DAYS):
-            for class_ in timetable.classes[day]:
-                # Example fitness criteria: penalize overlapping classes
-                if timetable.num_classes[day] > 1:
-                    fitness -= 1
-                # You can add more criteria based on room capacity, balanced workload, etc.
-                # Adjust fitness calculation as per specific requirements
-    return fitness
-
-# Tournament selection
-def tournament_selection(population, tournament_size):
-    selected = []
-    for _ in range(len(population)):
-        participants = random.sample(population, tournament_size)
-        winner = max(participants, key=lambda x: fitness_function(x))
-        selected.append(copy.deepcopy(winner))
-    return selected
-
-# Crossover (two-point crossover)
-def crossover(parent1, parent2):
-    point1 = random.randint(1, MAX_DAYS - 1)
-    point2 = random.randint(point1, MAX_DAYS - 1)
-
-    child1 = {}
-    child2 = {}
-
-    # Iterate over the divisions that actually exist in the parents
-    for division in parent1.keys():  # Assuming parent1 and parent2 have the same divisions
-        child1[division] = Timetable()
-        child2[division] = Timetable()
-
-        for day in range(1, MAX_DAYS):
-            if day < point1 or day >= point2:
-                child1[division].classes[day] = copy.deepcopy(parent1[division].classes[day])
-                child2[division].classes[day] = copy.deepcopy(parent2[division].classes[day])
-            else:
-                child1[division].classes[day] = copy.deepcopy(parent2[division].classes[day])
-                child2[division].classes[day] = copy.deepcopy(parent1[division].classes[day])
-
-    return child1, child2
-
-# Mutation (swap mutation)
-def mutate(timetable):
-    # Iterate over the divisions that actually exist in the timetable
-    for division in timetable.keys(): 
-        for day in range(1, MAX_DAYS):
-            if random.random() < MUTATION_RATE:
-                # Perform swap mutation on classes within the same day
-                num_classes = len(timetable[division].classes[day])
-                if num_classes > 1:
-                    idx1, idx2 = random.sample(range(num_classes), 2)
-                    timetable[division].classes[day][idx1], timetable[division].classes[day][idx2] = \
-                        timetable[division].classes[day][idx2], timetable[division].classes[day][idx1]
-
-    return timetable
-
-# Genetic algorithm main loop
-def genetic_algorithm(professors, subjects, divisions):
-    population = generate_initial_population(professors, subjects, divisions, POPULATION_SIZE)
-
-    for generation in range(NUM_GENERATIONS):
-        print(f"Generation {generation + 1}/{NUM_GENERATIONS}")
-        
-        # Selection
-        selected_population = tournament_selection(population, tournament_size=5)
+        for day, classes in enumerate(timetable.classes):
+            for class_ in classes:
+                genome[division - 1, day, class_.slot] = gene_index.get((class_.faculty, class_.subject), EMPTY_GENE)
+    return genome
+
+# Function to build Timetable objects for a single genome
+def decode_timetables(genome, genes, classrooms=None):
+    classrooms = classrooms or default_classrooms(len(genome))
+    timetables = {}
+    for division in range(1, len(genome) + 1):
+        timetable = Timetable()
+        classroom = classrooms[division]
+        for day in CALENDAR.teaching_days:
+            for time_slot in range(SLOTS_PER_DAY[day]):
+                faculty_name, subject = genes[genome[division - 1, day, time_slot]]
+                class_ = Class(time_slot, TIME_SLOTS[day][time_slot], faculty_name, subject.name, division, classroom, CLASS_NAME_FORMAT)
+                timetable.classes[day].append(class_)
+        timetables[division] = timetable
+    return timetables
 
-        # Crossover
-        offspring_population = []
-        for i in range(0, len(selected_population), 2):
-            parent1 = selected_population[i]
-            parent2 = selected_population[i + 1]
-            child1, child2 = crossover(parent1, parent2)
-            offspring_population.append(mutate(child1))
-            offspring_population.append(mutate(child2))
+# Function to evolve a population for a number of generations
+# occupancy is the per-individual faculty occupancy index kept in step with the genomes.
+# on_generation(generation, fitness, population) is called before every generation, a true
+# return value stops the run there.
+def evolve(population, scores, occupancy, rng, num_generations, model, on_generation=None, executor=None,
+           workers=1):
+    population_size = len(population)
+    buffer = population.copy()
+    score_buffer = scores.copy()
+    occupancy_buffer = occupancy.copy()
+
+    for generation in range(num_generations):
+        fitness = scores.sum(axis=1)
+        if on_generation is not None and on_generation(generation, fitness, population):
+            break
 
-        # Replacement (Elitism: Replace the worst individuals with the offspring)
-        population = sorted(population, key=lambda x: fitness_function(x), reverse=True)[:POPULATION_SIZE - len(offspring_population)]
-        population.extend(offspring_population)
+        # Selection
+        start = time.perf_counter()
+        winners = tournament_selection(fitness, TOURNAMENT_SIZE, rng)
+        selected = time.perf_counter()
+
+        # Crossover, children inherit the day scores and occupancy of the days they took from each parent
+        num_pairs = (population_size - ELITE_SIZE) // 2
+        offspring_population, sources = crossover(population, winners[0:2 * num_pairs:2],
+                                                  winners[1:2 * num_pairs:2], rng, buffer)
+        num_offspring = len(offspring_population)
+        inherit_days(scores, sources, score_buffer, day_axis=1)
+        inherit_days(occupancy, sources, occupancy_buffer, day_axis=1)
+        crossed = time.perf_counter()
+        score_buffer[:num_offspring, WEEKLY] = -score_chunks(model.weekly_penalties, offspring_population,
+                                                               executor, workers)
+        scored = time.perf_counter()
+
+        # Mutation, re-scored as O(1) deltas on the occupancy index
+        model.apply_swaps(buffer, occupancy_buffer, score_buffer, *mutate(offspring_population, rng))
+        mutated = time.perf_counter()
 
-    # Return the best timetable found in the final population
-    best_timetable = max(population, key=lambda x: fitness_function(x))
-    return best_timetable
+        # Replacement (Elitism: Replace the worst individuals with the offspring)
+        elite = np.argsort(-fitness, kind="stable")[:population_size - num_offspring]
+        buffer[num_offspring:] = population[elite]
+        score_buffer[num_offspring:] = scores[elite]
+        occupancy_buffer[num_offspring:] = occupancy[elite]
+        population, buffer = buffer, population
+        scores, score_buffer = score_buffer, scores
+        occupancy, occupancy_buffer = occupancy_buffer, occupancy
+
+        METRICS.observe("ga_phase_seconds", selected - start, phase="selection")
+        METRICS.observe("ga_phase_seconds", crossed - selected, phase="crossover")
+        METRICS.observe("ga_phase_seconds", scored - crossed, phase="fitness")
+        METRICS.observe("ga_phase_seconds", mutated - scored, phase="mutation")
+        METRICS.observe("ga_phase_seconds", time.perf_counter() - mutated, phase="replacement")
+        METRICS.increment("ga_generations_total")
+
+    return population, scores, occupancy
+
+# Genetic algorithm main loop, returns the best timetables and the run statistics
+# With workers > 1 fitness evaluation is spread over a process pool, one chunk per worker; populations
+# under 2 * PARALLEL_MIN_CHUNK_SIZE individuals are scored in this process, as pickling would cost more.
+# The run stops after num_generations or as soon as a convergence criterion fires.
+# initial_population replaces the random round-robin population, e.g. to start from seeds of another scheduler.
+def run_genetic_algorithm(professors, subjects, divisions, population_size=POPULATION_SIZE,
+                          num_generations=NUM_GENERATIONS, seed=None, workers=None,
+                          classrooms=None, subject_hours=None, convergence=None, initial_population=None,
+                          progress=None):
+    check_population_size(population_size if initial_population is None else len(initial_population))
+    rng = np.random.default_rng(seed)
+    convergence = convergence if convergence is not None else Convergence()
+    genes = build_gene_table(professors, subjects)[0]
+    model = build_constraint_model(professors, subjects, divisions, classrooms, subject_hours)
+    generations = 0
+
+    def report(generation, fitness, population):
+        nonlocal generations
+        generations = generation
+        if convergence.check(generation, fitness, population):
+            return True
+        if generation % PRINT_INTERVAL == 0:
+            print(f"Generation {generation + 1}/{num_generations}")
+        if progress is not None:
+            progress(generation=generation + 1, generations=num_generations, best_fitness=float(fitness.max()))
+        return False
+
+    convergence.start()
+    with (ProcessPoolExecutor(max_workers=workers) if workers and workers > 1 else nullcontext()) as executor:
+        if initial_population is None:
+            population = generate_initial_population(professors, subjects, divisions, population_size, rng)
+        else:
+            population = np.array(initial_population, dtype=np.int32)
+        scores = fitness_scores(population, model, executor, workers)
+        occupancy = model.faculty_occupancy(population)
+        population, scores, occupancy = evolve(population, scores, occupancy, rng, num_generations, model,
+                                               report, executor, workers)
+
+    fitness = scores.sum(axis=1)
+    stats = {
+        "generations": generations if convergence.reason else num_generations,
+        "stopped": convergence.reason or "generations",
+        "best_fitness": float(fitness.max()),
+        "wall_time": time.perf_counter() - convergence.started,
+    }
+    print(f"Stopped after {stats['generations']} generations ({stats['stopped']}), best fitness {stats['best_fitness']}")
+    if progress is not None:
+        progress(generation=stats["generations"], stopped=stats["stopped"], best_fitness=stats["best_fitness"])
+
+    # Build Timetable objects only for the best timetable found in the final population
+    best_timetable = decode_timetables(population[fitness.argmax()], genes, classrooms)
+    return best_timetable, stats
+
+# Genetic algorithm returning only the best timetables
+def genetic_algorithm(*args, **kwargs):
+    return run_genetic_algorithm(*args, **kwargs)[0]
+
+# Objectives of the multi-objective GA, all minimised. Clashes are not an objective but a constraint:
+# an individual with fewer clashes always dominates one with more (constrained domination).
+#  - subject_hours: weekly classes of each subject per division outside their target
+#  - faculty_gaps: free slots between a faculty member's first and last class of a day
+#  - load_variance: variance of the weekly number of classes across faculty members
+#  - room_changes: consecutive classes of a faculty member held in different rooms
+#  - back_to_back: a division having the same subject in two consecutive slots
+OBJECTIVES = ("subject_hours", "faculty_gaps", "load_variance", "room_changes", "back_to_back")
+
+# Objective values of every individual, shape (individuals, len(OBJECTIVES))
+def objective_values(population, occupancy, model):
+    return np.column_stack((
+        band_penalty(model.subject_hours(population), model.hours_low, model.hours_high).sum(axis=(1, 2)),
+        faculty_gaps(occupancy),
+        occupancy.sum(axis=(1, 2)).var(axis=1),
+        model.room_changes(population),
+        model.back_to_back(population),
+    ))
+
+# Fast non-dominated sorting, returns the front (0 = Pareto front) of every individual.
+# The domination matrix is built in one O(M·N²) pass, then fronts are peeled off by
+# subtracting the rows of each front from the domination counts, so every row is read once.
+def non_dominated_sort(objectives, violation):
+    no_worse = (objectives[:, None, :] <= objectives[None, :, :]).all(axis=2)
+    better = (objectives[:, None, :] < objectives[None, :, :]).any(axis=2)
+    dominates = ((violation[:, None] < violation[None, :])
+                 | ((violation[:, None] == violation[None, :]) & no_worse & better))
+
+    counts = dominates.sum(axis=0)
+    ranks = np.full(len(objectives), -1)
+    front = np.flatnonzero(counts == 0)
+    rank = 0
+    while len(front):
+        ranks[front] = rank
+        counts = counts - dominates[front].sum(axis=0)
+        counts[ranks >= 0] = -1
+        front = np.flatnonzero(counts == 0)
+        rank += 1
+    return ranks
+
+# Crowding distance of every individual within its front: the normalised size of the box between its
+# neighbours on every objective, infinite at the ends of a front so that its extremes are kept
+def crowding_distance(objectives, ranks):
+    distance = np.zeros(len(objectives))
+    for rank in np.unique(ranks):
+        members = np.flatnonzero(ranks == rank)
+        for values in objectives[members].T:
+            sort = np.argsort(values, kind="stable")
+            order = members[sort]
+            sorted_values = values[sort]
+            distance[order[[0, -1]]] = np.inf
+            spread = sorted_values[-1] - sorted_values[0]
+            if len(members) > 2 and spread > 0:
+                distance[order[1:-1]] += (sorted_values[2:] - sorted_values[:-2]) / spread
+    return distance
+
+# Binary tournament on the crowded comparison: lower front first, then larger crowding distance
+def crowded_tournament(ranks, distance, rng):
+    first, second = rng.integers(0, len(ranks), size=(2, len(ranks)))
+    first_wins = (ranks[first] < ranks[second]) | ((ranks[first] == ranks[second])
+                                                  & (distance[first] >= distance[second]))
+    return np.where(first_wins, first, second)
+
+# Function to evolve a population with NSGA-II: parents and offspring are pooled and the next
+# population is the best of the pool by front, then crowding distance.
+# Clash scores and occupancy are kept up to date incrementally as in evolve().
+# Returns the final population, scores, occupancy, objective values and fronts.
+def evolve_pareto(population, scores, occupancy, rng, num_generations, model, on_generation=None):
+    population_size = len(population)
+    num_offspring = population_size // 2 * 2
+    pool = np.concatenate((population, population[:num_offspring]))
+    score_pool = np.concatenate((scores, scores[:num_offspring]))
+    occupancy_pool = np.concatenate((occupancy, occupancy[:num_offspring]))
+    offspring = pool[population_size:]
+
+    objectives = objective_values(population, occupancy, model)
+    violation = -scores[:, :MAX_DAYS].sum(axis=1)
+    ranks = non_dominated_sort(objectives, violation)
+    distance = crowding_distance(objectives, ranks)
+
+    for generation in range(num_generations):
+        if on_generation is not None and on_generation(generation, ranks, objectives, violation):
+            break
+
+        # Offspring fill the second half of the pool, inheriting the day scores and occupancy of their parents
+        winners = crowded_tournament(ranks, distance, rng)
+        sources = crossover(pool, winners[0:num_offspring:2], winners[1:num_offspring:2], rng, offspring)[1]
+        inherit_days(score_pool, sources, score_pool[population_size:], day_axis=1)
+        inherit_days(occupancy_pool, sources, occupancy_pool[population_size:], day_axis=1)
+        score_pool[population_size:, WEEKLY] = -model.weekly_penalties(offspring)
+        model.apply_swaps(offspring, occupancy_pool[population_size:], score_pool[population_size:],
+                          *mutate(offspring, rng))
+
+        # Replacement: the best of parents and offspring by front, then crowding distance
+        objectives = objective_values(pool, occupancy_pool, model)
+        violation = -score_pool[:, :MAX_DAYS].sum(axis=1)
+        ranks = non_dominated_sort(objectives, violation)
+        distance = crowding_distance(objectives, ranks)
+        survivors = np.lexsort((-distance, ranks))[:population_size]
+        pool[:population_size] = pool[survivors]
+        score_pool[:population_size] = score_pool[survivors]
+        occupancy_pool[:population_size] = occupancy_pool[survivors]
+        objectives, violation, ranks, distance = (objectives[survivors], violation[survivors], ranks[survivors],
+                                                  distance[survivors])
+        METRICS.increment("ga_generations_total")
+
+    return (pool[:population_size], score_pool[:population_size], occupancy_pool[:population_size], objectives,
+            violation, ranks)
+
+# Multi-objective genetic algorithm (NSGA-II) over OBJECTIVES, with clashes as a constraint.
+# Returns the Pareto set as a list of {"timetables", "objectives", "clashes"}, one timetable per
+# distinct point of the first front, and the run statistics.
+def pareto_genetic_algorithm(professors, subjects, divisions, population_size=PARETO_POPULATION_SIZE,
+                             num_generations=NUM_GENERATIONS, seed=None, classrooms=None, subject_hours=None,
+                             initial_population=None, progress=None):
+    check_population_size(population_size if initial_population is None else len(initial_population))
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    genes = build_gene_table(professors, subjects)[0]
+    model = build_constraint_model(professors, subjects, divisions, classrooms, subject_hours)
+    generations = num_generations
+
+    def report(generation, ranks, objectives, violation):
+        if generation % PRINT_INTERVAL == 0:
+            print(f"Generation {generation + 1}/{num_generations}: {np.count_nonzero(ranks == 0)} on the front")
+        if progress is not None:
+            progress(generation=generation + 1, generations=num_generations, front=int(np.count_nonzero(ranks == 0)))
+        return False
+
+    if initial_population is None:
+        population = generate_initial_population(professors, subjects, divisions, population_size, rng)
+    else:
+        population = np.array(initial_population, dtype=np.int32)
+    population, scores, occupancy, objectives, violation, ranks = evolve_pareto(
+        population, fitness_scores(population, model), model.faculty_occupancy(population), rng, num_generations,
+        model, report)
+
+    front = np.flatnonzero(ranks == 0)
+    front = front[np.unique(objectives[front], axis=0, return_index=True)[1]]  # Sorted by objectives
+    pareto_set = [{"timetables": decode_timetables(population[index], genes, classrooms),
+                   "objectives": dict(zip(OBJECTIVES, objectives[index].tolist())),
+                   "clashes": int(violation[index])}
+                  for index in front]
+    stats = {"generations": generations, "front_size": len(pareto_set), "wall_time": time.perf_counter() - started}
+    print(f"Pareto set of {len(pareto_set)} timetables, clash penalty {pareto_set[0]['clashes']}")
+    return pareto_set, stats
+
+# Function to pick one timetable of a Pareto set: the one with the smallest sum of objectives,
+# each scaled to the range it spans on the set
+def compromise(pareto_set):
+    objectives = np.array([list(member["objectives"].values()) for member in pareto_set])
+    spread = objectives.max(axis=0) - objectives.min(axis=0)
+    scaled = (objectives - objectives.min(axis=0)) / np.where(spread > 0, spread, 1)
+    return int(scaled.sum(axis=1).argmin())
+
+# Multi-objective scheduling in the form of the engine registry: returns the compromise timetables,
+# with the whole Pareto set in the statistics for administrators to choose from
+def pareto_scheduling(professors, subjects, divisions, classrooms=None, seed=None, **options):
+    pareto_set, stats = pareto_genetic_algorithm(professors, subjects, divisions, seed=seed, classrooms=classrooms,
+                                                 **options)
+    chosen = compromise(pareto_set)
+    stats["chosen"] = chosen
+    stats["pareto_front"] = [dict(member["objectives"], clashes=member["clashes"]) for member in pareto_set]
+    stats["pareto_timetables"] = [member["timetables"] for member in pareto_set]
+    return pareto_set[chosen]["timetables"], stats
+
+# Function run in a worker process: evolve one island for one migration interval
+def evolve_island(population, scores, occupancy, rng, num_generations, model):
+    population, scores, occupancy = evolve(population, scores, occupancy, rng, num_generations, model)
+    return population, scores, occupancy, rng
+
+# Function to move the best individuals of every island to the next island in the ring,
+# replacing its worst individuals
+def migrate(islands, migration_size):
+    elites = []
+    for population, scores, occupancy, rng in islands:
+        best = np.argsort(-scores.sum(axis=1), kind="stable")[:migration_size]
+        elites.append((population[best], scores[best], occupancy[best]))
+
+    for index, (population, scores, occupancy, rng) in enumerate(islands):
+        migrants, migrant_scores, migrant_occupancy = elites[index - 1]
+        worst = np.argsort(scores.sum(axis=1), kind="stable")[:len(migrants)]
+        population[worst] = migrants
+        scores[worst] = migrant_scores
+        occupancy[worst] = migrant_occupancy
+
+# Island-model genetic algorithm: independent sub-populations evolve in separate worker
+# processes and exchange elites every migration_interval generations.
+# Each island owns a generator spawned from the seed, so a fixed seed gives the same
+# result whatever the number of workers.
+def island_genetic_algorithm(professors, subjects, divisions, num_islands=NUM_ISLANDS, workers=None,
+                             migration_interval=MIGRATION_INTERVAL, migration_size=MIGRATION_SIZE,
+                             population_size=POPULATION_SIZE, num_generations=NUM_GENERATIONS, seed=None,
+                             classrooms=None, subject_hours=None, convergence=None):
+    check_population_size(population_size)
+    convergence = convergence if convergence is not None else Convergence()
+    convergence.start()
+    genes = build_gene_table(professors, subjects)[0]
+    model = build_constraint_model(professors, subjects, divisions, classrooms, subject_hours)
+    islands = []
+    for seed_sequence in np.random.SeedSequence(seed).spawn(num_islands):
+        rng = np.random.default_rng(seed_sequence)
+        population = generate_initial_population(professors, subjects, divisions, population_size, rng)
+        islands.append((population, fitness_scores(population, model), model.faculty_occupancy(population), rng))
+
+    with ProcessPoolExecutor(max_workers=workers or num_islands) as executor:
+        generation = 0
+        while generation < num_generations:
+            interval = min(migration_interval, num_generations - generation)
+            futures = [executor.submit(evolve_island, population, scores, occupancy, rng, interval, model)
+                       for population, scores, occupancy, rng in islands]
+            islands = [future.result() for future in futures]
+            generation += interval
+            print(f"Generation {generation}/{num_generations}")
+
+            # Convergence is checked at migration boundaries, over all islands together
+            population = np.concatenate([island[0] for island in islands])
+            if convergence.check(generation, np.concatenate([island[1] for island in islands]).sum(axis=1),
+                                 population):
+                print(f"Stopped after {generation} generations ({convergence.reason})")
+                break
+            if generation < num_generations and num_islands > 1:
+                migrate(islands, migration_size)
+
+    # Build Timetable objects only for the best timetable found on any island
+    population, scores = max(((population, scores) for population, scores, occupancy, rng in islands),
+                             key=lambda island: island[1].sum(axis=1).max())
+    return decode_timetables(population[scores.sum(axis=1).argmax()], genes, classrooms)
 
 # Function to simulate input form and generate timetables
 def generate_timetables():
@@ -212,7 +639,7 @@ if __name__ == "__main__":
     # Print the best generated timetable
     for division, timetable in timetables.items():
         print(f"Timetable for Division {division}:")
-        for day in range(1, MAX_DAYS):
+        for day in CALENDAR.teaching_days:
             print(f"  Day {day}:")
             for class_ in timetable.classes[day]:
                 print(f"    {class_.time} - {class_.name} (Subject: {class_.subject}, Faculty: {class_.faculty}, Classroom: {class_.classroom})")
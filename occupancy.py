@@ -0,0 +1,55 @@
+import threading
+from collections import Counter
+
+# Occupancy index of a set of timetables: bookings keyed by (day, slot, faculty) and (day, slot, room).
+# Conflict checks are dictionary lookups instead of scans over the classes of every other division.
+# book() checks and records a class atomically, so divisions can be built from several threads at once.
+class OccupancyIndex:
+    def __init__(self):
+        self.faculty = Counter()
+        self.rooms = Counter()
+        self.lock = threading.Lock()
+
+    # Function to build the index of existing timetables
+    @classmethod
+    def from_timetables(cls, timetables):
+        index = cls()
+        for timetable in timetables.values():
+            for day, classes in enumerate(timetable.classes):
+                for class_ in classes:
+                    index.add(day, class_.slot, class_.faculty, class_.classroom)
+        return index
+
+    def faculty_busy(self, day, slot, faculty):
+        return (day, slot, faculty) in self.faculty
+
+    def room_busy(self, day, slot, room):
+        return (day, slot, room) in self.rooms
+
+    # Function to book a faculty member and a room for a slot, returns False without booking on a clash
+    def book(self, day, slot, faculty, room):
+        with self.lock:
+            if (day, slot, faculty) in self.faculty or (day, slot, room) in self.rooms:
+                return False
+            self.faculty[(day, slot, faculty)] = 1
+            self.rooms[(day, slot, room)] = 1
+            return True
+
+    # Function to record a class whether it clashes or not
+    def add(self, day, slot, faculty, room):
+        with self.lock:
+            self.faculty[(day, slot, faculty)] += 1
+            self.rooms[(day, slot, room)] += 1
+
+    def release(self, day, slot, faculty, room):
+        with self.lock:
+            for counter, key in ((self.faculty, (day, slot, faculty)), (self.rooms, (day, slot, room))):
+                counter[key] -= 1
+                if counter[key] <= 0:
+                    del counter[key]
+
+    # Bookings beyond the first one of each (day, slot, faculty) and (day, slot, room)
+    def clashes(self):
+        with self.lock:
+            return (sum(count - 1 for count in self.faculty.values() if count > 1),
+                    sum(count - 1 for count in self.rooms.values() if count > 1))
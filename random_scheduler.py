@@ -0,0 +1,50 @@
+import random
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from models import Class, Timetable
+from occupancy import OccupancyIndex
+from timegrid import CALENDAR
+
+# Random scheduler of the login-protected app, kept apart from the web app so it loads without Flask
+
+# Function to schedule the classes of one division, a slot is left empty when the randomly
+# chosen faculty member or the division's classroom is already booked at that time
+def schedule_division(division, timetable, occupancy, professors, subjects, classroom, rng):
+    for day, time_slot in CALENDAR.cells:  # Holidays have no cells
+        # Randomly select a faculty member and one of their subjects
+        faculty_name = rng.choice(professors)
+        subject = rng.choice(subjects[faculty_name])
+        if not occupancy.book(day, time_slot, faculty_name, classroom):
+            continue
+
+        # Create the class and add it to the timetable
+        class_ = Class(time_slot, CALENDAR.time_slots[day][time_slot], faculty_name, subject.name, division, classroom)
+        timetable.classes[day].append(class_)
+
+# Random scheduling of every division, returns the timetables and the number of classes and empty slots.
+# A fixed seed gives the same timetables for the same input when divisions are built one at a time;
+# with workers > 1 divisions are built on threads sharing the occupancy index.
+def random_scheduling(professors, subjects, divisions, classrooms, seed=None, workers=None, progress=None):
+    occupancy = OccupancyIndex()
+    timetables = {division: Timetable() for division in range(1, divisions + 1)}
+
+    if workers and workers > 1:
+        # Each division draws from its own generator
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(schedule_division, division, timetables[division], occupancy, professors,
+                                       subjects, classrooms[division],
+                                       random.Random(None if seed is None else f"{seed}-{division}"))
+                       for division in timetables]
+            for done, future in enumerate(as_completed(futures), 1):
+                future.result()
+                if progress is not None:
+                    progress(phase="scheduling", division=done, divisions=divisions)
+    else:
+        rng = random.Random(seed)
+        for division in timetables:
+            schedule_division(division, timetables[division], occupancy, professors, subjects,
+                              classrooms[division], rng)
+            if progress is not None:
+                progress(phase="scheduling", division=division, divisions=divisions)
+
+    classes = sum(len(classes) for timetable in timetables.values() for classes in timetable.classes)
+    return timetables, {"classes": classes, "empty_slots": divisions * CALENDAR.weekly_slots - classes}
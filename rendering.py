@@ -0,0 +1,36 @@
+import time
+from flask import Response, current_app, stream_with_context
+from metrics import METRICS
+from timegrid import CALENDAR
+
+# Template output pieces collected before each chunk is sent to the client
+STREAM_BUFFER = 64
+
+# Function to index a timetable's classes by (day, slot), keeping the first class of each cell
+def class_index(timetable):
+    index = {}
+    for day, classes in enumerate(timetable.classes):
+        for class_ in classes:
+            index.setdefault((day, class_.slot), class_)
+    return index
+
+# Generator of (division, classroom, class index), built lazily one division at a time
+def division_tables(timetables):
+    for division, timetable in timetables.items():
+        classroom = next((class_.classroom for classes in timetable.classes for class_ in classes), None)
+        yield division, classroom, class_index(timetable)
+
+# Generator passing the chunks of a stream through, recording how long rendering took in total
+def timed(stream, name):
+    start = time.perf_counter()
+    yield from stream
+    METRICS.observe(name, time.perf_counter() - start)
+
+# Function to stream the timetable page, with one column per teaching day and one row per slot of the calendar
+def stream_timetables(timetables, calendar=CALENDAR, status=200, headers=None):
+    template = current_app.jinja_env.get_template("timetable.html")
+    stream = template.stream(divisions=division_tables(timetables),
+                             days=[(day, calendar.day_names[day]) for day in calendar.teaching_days],
+                             rows=calendar.rows())
+    stream.enable_buffering(STREAM_BUFFER)
+    return Response(stream_with_context(timed(stream, "render_seconds")), status, headers, mimetype="text/html")
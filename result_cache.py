@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import pickle
+import re
+import threading
+from collections import OrderedDict
+from timegrid import CALENDAR
+
+# Memory tier and disk tier budgets, in bytes of pickled results
+MEMORY_CACHE_BYTES = int(os.environ.get("TIMETABLE_CACHE_MEMORY_BYTES", 64 * 1024 * 1024))
+DISK_CACHE_BYTES = int(os.environ.get("TIMETABLE_CACHE_DISK_BYTES", 1024 * 1024 * 1024))
+CACHE_DIR = os.environ.get("TIMETABLE_CACHE_DIR",
+                           os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "results"))
+
+# Keys are SHA-256 hex digests (request_key), anything else is never turned into a file path
+KEY_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+# Bumped whenever the cached result classes change, so old entries are not served
+CACHE_VERSION = 2
+
+# Function to build the cache key of a generation request: a hash of its canonical JSON form
+def request_key(engine, professors, subjects, divisions, classrooms, seed=None, **options):
+    canonical = {
+        "version": CACHE_VERSION,
+        "calendar": CALENDAR.to_dict(),
+        "engine": engine,
+        "professors": list(professors),
+        "subjects": {professor: [subject.name for subject in subjects[professor]] for professor in professors},
+        "divisions": divisions,
+        "classrooms": {str(division): classrooms[division] for division in sorted(classrooms)},
+        "seed": seed,
+        "options": options,
+    }
+    encoded = json.dumps(canonical, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+# Content-addressed result cache with a memory tier in front of a disk tier.
+# Both tiers hold pickled results and evict least recently used entries past their byte budget.
+class ResultCache:
+    def __init__(self, directory=CACHE_DIR, memory_bytes=MEMORY_CACHE_BYTES, disk_bytes=DISK_CACHE_BYTES):
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.memory = OrderedDict()
+        self.memory_size = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, key):
+        if not KEY_PATTERN.fullmatch(key):
+            raise ValueError(f"Invalid result cache key: {key!r}")
+        return os.path.join(self.directory, f"{key}.pickle")
+
+    # Function to look a key up, returns the cached result or None (also for keys that are not a request_key)
+    def get(self, key):
+        if not isinstance(key, str) or not KEY_PATTERN.fullmatch(key):
+            return None
+        with self.lock:
+            data = self.memory.get(key)
+            if data is not None:
+                self.memory.move_to_end(key)
+            elif self.directory:
+                data = self.read_disk(key)
+                if data is not None:
+                    self.store_memory(key, data)
+
+            try:
+                result = pickle.loads(data) if data is not None else None
+            except Exception:
+                # Written by a different version of the code: drop it
+                self.discard(key)
+                result = None
+
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return result
+
+    def put(self, key, result):
+        data = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self.store_memory(key, data)
+            if self.directory:
+                self.write_disk(key, data)
+
+    def store_memory(self, key, data):
+        if len(data) > self.memory_bytes:
+            return
+        if key in self.memory:
+            self.memory_size -= len(self.memory.pop(key))
+        self.memory[key] = data
+        self.memory_size += len(data)
+        while self.memory_size > self.memory_bytes:
+            self.memory_size -= len(self.memory.popitem(last=False)[1])
+
+    def read_disk(self, key):
+        try:
+            with open(self.path(key), "rb") as file:
+                data = file.read()
+        except OSError:
+            return None
+        try:
+            os.utime(self.path(key))  # Recency for eviction
+        except OSError:
+            pass  # Evicted by another worker process since the read
+        return data
+
+    def write_disk(self, key, data):
+        # The directory is created by the first write, not when an app creates its cache
+        os.makedirs(self.directory, exist_ok=True)
+        temporary = f"{self.path(key)}.{threading.get_ident()}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(data)
+        os.replace(temporary, self.path(key))
+        self.evict_disk()
+
+    # Function to remove the least recently used files once the disk tier is over budget
+    def evict_disk(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".pickle"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for mtime, size, path in entries)
+        for mtime, size, path in sorted(entries):
+            if total <= self.disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def discard(self, key):
+        if key in self.memory:
+            self.memory_size -= len(self.memory.pop(key))
+        if self.directory:
+            try:
+                os.remove(self.path(key))
+            except OSError:
+                pass
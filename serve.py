@@ -0,0 +1,95 @@
+import argparse
+import importlib
+import os
+import sys
+
+# Production serving of the Flask apps, in place of the single-process debug server of app.run(debug=True).
+# workers processes each run threads request threads. Sessions are signed cookies and results live in the
+# shared result cache and timetable store, so any worker can serve any request; a generation job runs in the
+# worker that accepted it, its status is shared with the others through JOB_DIR and its result through the
+# result cache.
+# The first installed server of SERVERS is used unless one is named:
+#   gunicorn  workers x threads (gthread workers)
+#   waitress  threads in a single process, workers is ignored
+#   werkzeug  always available, a thread per request (one request at a time with threads=1) in a single
+#             process, workers is ignored: its forking mode ends each process with its request, killing the
+#             generation jobs it started
+APPS = {
+    "ttgenerator": ("ttgenerator", "app"),
+    "generator": ("generator", "app"),
+    "portal": ("timetable_store", "create_app"),
+}
+SERVERS = ("gunicorn", "waitress", "werkzeug")
+WORKERS = int(os.environ.get("TIMETABLE_WORKERS", os.cpu_count() or 1))
+THREADS = int(os.environ.get("TIMETABLE_THREADS", 8))
+HOST = os.environ.get("TIMETABLE_HOST", "127.0.0.1")
+PORT = int(os.environ.get("TIMETABLE_PORT", 8000))
+REQUEST_TIMEOUT = 120  # seconds a gunicorn worker may spend on one request, e.g. a long streamed export
+
+# Function to import an app by its APPS name, portal apps are built by their factory
+def load_app(name):
+    module, attribute = APPS[name]
+    app = getattr(importlib.import_module(module), attribute)
+    return app() if name == "portal" else app
+
+# First server of SERVERS that is installed
+def available_server():
+    for server in SERVERS[:-1]:
+        try:
+            importlib.import_module(server)
+        except ImportError:
+            continue
+        return server
+    return SERVERS[-1]
+
+def serve_gunicorn(name, host, port, workers, threads):
+    from gunicorn.app.base import BaseApplication
+
+    # Gunicorn app loading the Flask app in each worker, so every worker starts its own job threads
+    class Application(BaseApplication):
+        def load_config(self):
+            for key, value in {"bind": f"{host}:{port}", "workers": workers, "threads": threads,
+                               "worker_class": "gthread", "timeout": REQUEST_TIMEOUT}.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return load_app(name)
+
+    Application().run()
+
+def serve_waitress(name, host, port, workers, threads):
+    import waitress
+
+    if workers > 1:
+        print("waitress serves from a single process, ignoring --workers", file=sys.stderr)
+    waitress.serve(load_app(name), host=host, port=port, threads=threads)
+
+def serve_werkzeug(name, host, port, workers, threads):
+    from werkzeug.serving import run_simple
+
+    if workers > 1:
+        print("werkzeug serves from a single process, ignoring --workers", file=sys.stderr)
+    run_simple(host, port, load_app(name), threaded=threads > 1)
+
+# Function to serve an app until interrupted
+def serve(name, host=HOST, port=PORT, workers=WORKERS, threads=THREADS, server=None):
+    server = server or available_server()
+    print(f"Serving {name} with {server} on http://{host}:{port} ({workers} workers x {threads} threads)",
+          file=sys.stderr)
+    {"gunicorn": serve_gunicorn, "waitress": serve_waitress, "werkzeug": serve_werkzeug}[server](
+        name, host, port, workers, threads)
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a timetable app with a production server.")
+    parser.add_argument("app", nargs="?", default="ttgenerator", choices=APPS)
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=WORKERS, help="worker processes (default: CPU count)")
+    parser.add_argument("--threads", type=int, default=THREADS, help="request threads per worker")
+    parser.add_argument("--server", choices=SERVERS, help="default: the first one installed")
+    args = parser.parse_args()
+    serve(args.app, args.host, args.port, args.workers, args.threads, args.server)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+import json
+import os
+import sys
+
+# Default week: Sunday off, six teaching slots a day, Saturday a half day
+DAY_NAMES = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+SLOT_TIMES = ["8:00 AM", "9:00 AM", "10:00 AM", "11:15 AM", "12:15 PM", "2:00 PM"]
+HOLIDAYS = [0]
+HALF_DAYS = {6: 5}  # day -> number of slots
+BREAKS = {3: "Breakfast Break(11:00-11:15)", 5: "Lunch Break(1:15-2:00)"}  # slot -> break shown before it
+
+# Calendar of a teaching week, precomputed into integer ids.
+# Days are indices into day_names (and into Timetable.classes) and slots are indices into slot_times;
+# every teaching (day, slot) cell is listed in cells, in day-major order.
+class Calendar:
+    def __init__(self, day_names=DAY_NAMES, slot_times=SLOT_TIMES, holidays=HOLIDAYS, half_days=HALF_DAYS,
+                 breaks=BREAKS):
+        self.day_names = list(day_names)
+        self.slot_times = [sys.intern(time) for time in slot_times]
+        self.holidays = sorted(int(day) for day in holidays)
+        self.half_days = {int(day): count for day, count in half_days.items()}
+        self.breaks = {int(slot): label for slot, label in breaks.items()}
+
+        self.num_days = len(self.day_names)
+        self.max_slots = len(self.slot_times)
+        self.slots_per_day = [0 if day in self.holidays else min(self.half_days.get(day, self.max_slots), self.max_slots)
+                              for day in range(self.num_days)]
+        self.teaching_days = [day for day in range(self.num_days) if self.slots_per_day[day]]
+        # Slot times of each day, the nested list form the schedulers index by [day][slot]
+        self.time_slots = [self.slot_times[:count] for count in self.slots_per_day]
+        self.cells = [(day, slot) for day in self.teaching_days for slot in range(self.slots_per_day[day])]
+
+    # Number of teaching slots in a week
+    @property
+    def weekly_slots(self):
+        return len(self.cells)
+
+    # Rows of a rendered timetable: (slot, time, break shown before the slot or None)
+    def rows(self):
+        return [(slot, time, self.breaks.get(slot)) for slot, time in enumerate(self.slot_times)]
+
+    def to_dict(self):
+        return {"day_names": self.day_names, "slot_times": self.slot_times, "holidays": self.holidays,
+                "half_days": self.half_days, "breaks": self.breaks}
+
+    # Function to read a calendar from a JSON file with the keys of to_dict(), all optional
+    @classmethod
+    def from_file(cls, path):
+        with open(path) as file:
+            return cls(**json.load(file))
+
+# Calendar used by the schedulers and the renderer, set TIMETABLE_CALENDAR to a JSON file to change it
+CALENDAR = Calendar.from_file(os.environ["TIMETABLE_CALENDAR"]) if os.environ.get("TIMETABLE_CALENDAR") else Calendar()
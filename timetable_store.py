@@ -0,0 +1,256 @@
+import os
+import threading
+import time
+from models import Class, Timetable
+from timegrid import CALENDAR
+
+# SQLite database of generated timetables, in the Flask instance folder unless TIMETABLE_STORE is set
+STORE_PATH = os.environ.get("TIMETABLE_STORE",
+                            os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "timetables.sqlite3"))
+STORE_TIMEOUT = 30.0  # seconds to wait for another writer, batch workers save concurrently
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS timetables (
+    id INTEGER PRIMARY KEY,
+    key TEXT UNIQUE,
+    name TEXT,
+    engine TEXT,
+    divisions INTEGER NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS classes (
+    timetable_id INTEGER NOT NULL REFERENCES timetables(id) ON DELETE CASCADE,
+    division INTEGER NOT NULL,
+    day INTEGER NOT NULL,
+    slot INTEGER NOT NULL,
+    time TEXT NOT NULL,
+    faculty TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    classroom TEXT NOT NULL,
+    name TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS classes_by_faculty ON classes (timetable_id, faculty, day, slot);
+CREATE INDEX IF NOT EXISTS classes_by_room ON classes (timetable_id, classroom, day, slot);
+CREATE INDEX IF NOT EXISTS classes_by_division ON classes (timetable_id, division, day, slot);
+"""
+
+# Columns of a class row, in the order they are stored and returned
+CLASS_COLUMNS = ("division", "day", "slot", "time", "faculty", "subject", "classroom", "name")
+
+# Persistent store of generated timetables.
+# Every class is one row, indexed by faculty, room and division (then day and slot), so the
+# per-faculty, per-room and per-division views are read straight from an index.
+# Each thread gets its own connection; the database runs in WAL mode so reads never wait for a writer.
+# The database is only opened (and created) by the first connection, not when an app creates its store.
+class TimetableStore:
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self.local = threading.local()
+        self.created = False
+
+    def connection(self):
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            import sqlite3
+
+            if not self.created:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=STORE_TIMEOUT)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA foreign_keys=ON")
+            if not self.created:
+                with connection:
+                    connection.executescript(SCHEMA)
+                self.created = True
+            self.local.connection = connection
+        return connection
+
+    # Function to store {division: Timetable}, returns its id.
+    # Timetables saved under a key that is already stored (a result cache key) are not stored twice,
+    # also when threads or processes save the same key at once: the write lock is taken up front.
+    def save(self, timetables, key=None, name=None, engine=None):
+        with self.connection() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            cursor = connection.execute(
+                "INSERT INTO timetables (key, name, engine, divisions, created) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO NOTHING", (key, name, engine, len(timetables), time.time()))
+            if cursor.rowcount == 0:
+                return connection.execute("SELECT id FROM timetables WHERE key = ?", (key,)).fetchone()["id"]
+            timetable_id = cursor.lastrowid
+            connection.executemany(
+                f"INSERT INTO classes (timetable_id, {', '.join(CLASS_COLUMNS)}) VALUES (?{', ?' * len(CLASS_COLUMNS)})",
+                ((timetable_id, division, day, class_.slot, class_.time, class_.faculty, class_.subject,
+                  class_.classroom, class_.name)
+                 for division, timetable in timetables.items()
+                 for day, classes in enumerate(timetable.classes)
+                 for class_ in classes))
+        return timetable_id
+
+    # Function to list the stored timetables, newest first
+    def list(self, limit=100):
+        rows = self.connection().execute(
+            "SELECT id, key, name, engine, divisions, created FROM timetables ORDER BY id DESC LIMIT ?", (limit,))
+        return [dict(row) for row in rows]
+
+    # Id of the newest stored timetable, or None when the store is empty
+    def latest_id(self):
+        row = self.connection().execute("SELECT MAX(id) AS id FROM timetables").fetchone()
+        return row["id"]
+
+    def exists(self, timetable_id):
+        return self.connection().execute("SELECT 1 FROM timetables WHERE id = ?", (timetable_id,)).fetchone() is not None
+
+    # Function to read the classes of a stored timetable, optionally only those of one faculty member,
+    # classroom, division and/or day. Returns dicts with the CLASS_COLUMNS keys, ordered by day and slot.
+    def classes(self, timetable_id, faculty=None, classroom=None, division=None, day=None):
+        conditions = ["timetable_id = ?"]
+        values = [timetable_id]
+        for column, value in (("faculty", faculty), ("classroom", classroom), ("division", division), ("day", day)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                values.append(value)
+        rows = self.connection().execute(
+            f"SELECT {', '.join(CLASS_COLUMNS)} FROM classes WHERE {' AND '.join(conditions)} "
+            "ORDER BY day, slot, division", values)
+        return [dict(row) for row in rows]
+
+    # Generator of the (division, day, Class) records of a stored timetable, ordered by division, day and slot,
+    # optionally only those of one faculty member or division. Rows are read from the cursor as they are
+    # consumed, so exports of large timetables never load the timetable as a whole.
+    def records(self, timetable_id, faculty=None, division=None):
+        conditions = ["timetable_id = ?"]
+        values = [timetable_id]
+        for column, value in (("faculty", faculty), ("division", division)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                values.append(value)
+        rows = self.connection().execute(
+            f"SELECT {', '.join(CLASS_COLUMNS)} FROM classes WHERE {' AND '.join(conditions)} "
+            "ORDER BY division, day, slot", values)
+        for row in rows:
+            yield row["division"], row["day"], stored_class(row)
+
+    # Function to rebuild {division: Timetable} from a stored timetable
+    def load(self, timetable_id):
+        row = self.connection().execute("SELECT divisions FROM timetables WHERE id = ?", (timetable_id,)).fetchone()
+        if row is None:
+            return None
+        timetables = {division: Timetable() for division in range(1, row["divisions"] + 1)}
+        for class_ in self.classes(timetable_id):
+            timetables.setdefault(class_["division"], Timetable()).classes[class_["day"]].append(stored_class(class_))
+        return timetables
+
+# Function to rebuild a Class from a stored row.
+# The stored name, escaped, is the name format: names read back as they were shown.
+def stored_class(row):
+    name_format = row["name"].replace("{", "{{").replace("}", "}}")
+    return Class(row["slot"], row["time"], row["faculty"], row["subject"], row["division"], row["classroom"],
+                 name_format)
+
+# Function to parse a day given by name or index, returns None when it is not a day of the calendar
+def parse_day(text):
+    if text.isdigit():
+        return int(text) if int(text) < CALENDAR.num_days else None
+    names = [name.lower() for name in CALENDAR.day_names]
+    return names.index(text.lower()) if text.lower() in names else None
+
+# Function to add the read endpoints of a store to a Flask app.
+# <timetable_id> is a stored id or "latest"; the class views take an optional ?day= (name or index).
+#   GET /timetables                                  stored timetables, newest first
+#   GET /timetables/<timetable_id>                   the rendered timetable page
+#   GET /timetables/<timetable_id>/faculty/<name>    classes of a faculty member
+#   GET /timetables/<timetable_id>/rooms/<room>      classes held in a classroom
+#   GET /timetables/<timetable_id>/divisions/<n>     classes of a division
+#   GET /timetables/<timetable_id>/export.<format>   streamed json, csv or ics export, ?faculty= and ?division=
+#                                                    narrow it to one faculty member or division (a personal feed)
+# They only read the store, the scheduler is never involved.
+# protect decorates every view, e.g. flask_login.login_required on an app behind a login.
+def register_store_routes(app, store, protect=None):
+    from flask import Response, jsonify, request, stream_with_context
+    from rendering import stream_timetables
+
+    protect = protect or (lambda view: view)
+
+    # Stored id of a timetable_id route argument, or None when there is no such timetable
+    def stored_id(timetable_id):
+        if timetable_id == "latest":
+            return store.latest_id()
+        if timetable_id.isdigit() and store.exists(int(timetable_id)):
+            return int(timetable_id)
+        return None
+
+    def class_view(timetable_id, **filters):
+        timetable_id = stored_id(timetable_id)
+        if timetable_id is None:
+            return jsonify(error="unknown timetable"), 404
+        day = None
+        if request.args.get("day"):
+            day = parse_day(request.args["day"])
+            if day is None:
+                return jsonify(error=f"unknown day: {request.args['day']}"), 400
+        classes = store.classes(timetable_id, day=day, **filters)
+        for class_ in classes:
+            class_["day"] = CALENDAR.day_names[class_["day"]]
+        return jsonify(timetable=timetable_id, classes=classes)
+
+    @app.route("/timetables")
+    @protect
+    def stored_timetables():
+        return jsonify(timetables=store.list(request.args.get("limit", 100, type=int)))
+
+    @app.route("/timetables/<timetable_id>")
+    @protect
+    def stored_timetable(timetable_id):
+        timetable_id = stored_id(timetable_id)
+        if timetable_id is None:
+            return jsonify(error="unknown timetable"), 404
+        return stream_timetables(store.load(timetable_id))
+
+    @app.route("/timetables/<timetable_id>/faculty/<faculty>")
+    @protect
+    def faculty_classes(timetable_id, faculty):
+        return class_view(timetable_id, faculty=faculty)
+
+    @app.route("/timetables/<timetable_id>/rooms/<classroom>")
+    @protect
+    def room_classes(timetable_id, classroom):
+        return class_view(timetable_id, classroom=classroom)
+
+    @app.route("/timetables/<timetable_id>/divisions/<int:division>")
+    @protect
+    def division_classes(timetable_id, division):
+        return class_view(timetable_id, division=division)
+
+    @app.route("/timetables/<timetable_id>/export.<export_format>")
+    @protect
+    def export_timetable(timetable_id, export_format):
+        from export import FORMATS, exporter
+
+        timetable_id = stored_id(timetable_id)
+        if timetable_id is None:
+            return jsonify(error="unknown timetable"), 404
+        if export_format not in FORMATS:
+            return jsonify(error=f"unknown export format: {export_format}"), 400
+        faculty = request.args.get("faculty")
+        division = request.args.get("division", type=int)
+        name = f"Timetable {timetable_id}" + (f" - {faculty}" if faculty else "") + \
+            (f" - Division {division}" if division is not None else "")
+        records = store.records(timetable_id, faculty=faculty, division=division)
+        response = Response(stream_with_context(exporter(export_format, records, name=name)),
+                            mimetype=FORMATS[export_format])
+        response.headers["Content-Disposition"] = f"attachment; filename=timetable-{timetable_id}.{export_format}"
+        return response
+
+# Function to build a read-only portal app serving only the stored timetables
+def create_app(store=None):
+    from flask import Flask
+    from metrics import instrument_app
+
+    app = Flask(__name__)
+    instrument_app(app)
+    register_store_routes(app, store or TimetableStore())
+    return app
+
+if __name__ == "__main__":
+    create_app().run()